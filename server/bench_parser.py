@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк парсера на синтетических страницах из fixtures/ (без сети).
+
+Для каждой страницы и каждого парсера (bs4, lxml) замеряет функции parser.py
+и построение индексов: время одного вызова (минимум и медиана по повторам)
+и пик памяти Python-объектов (tracemalloc, отдельным прогоном — трассировка
+замедляет код). Память дерева lxml выделяет libxml2, tracemalloc её не видит.
+
+Результаты можно сохранить как базовые и сравнить с ними после изменений:
+
+    python bench_parser.py --save baseline.json        # до изменений
+    python bench_parser.py --compare baseline.json     # после: код выхода 1 при регрессии
+
+Сравнивать имеет смысл замеры, снятые на одной машине. В репозитории лежат
+базовые замеры bench_baseline.json (машина и Python записаны в файле).
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Optional
+
+from effective import EffectiveIndex
+from snapshot import (
+    PARSER_BACKENDS, build_schedule_snapshot, build_teacher_index, build_replacements_snapshot,
+    parse_schedule_page
+)
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Минимальная длительность одного замера: быстрые функции вызываются в цикле
+MIN_SAMPLE_SECONDS = 0.02
+
+# Рост времени меньше этого (мс) — шум, а не регрессия
+MIN_REGRESSION_MS = 0.1
+
+
+class Case:
+    """Замеряемая операция: run() выполняет calls вызовов функции"""
+
+    def __init__(self, name: str, run: Callable[[], object], calls: int = 1):
+        self.name = name
+        self.run = run
+        self.calls = max(calls, 1)
+
+
+def schedule_cases(html: str, backend) -> list[Case]:
+    document = backend.parse_document(html)
+    specialties = backend.parse_specialties(document)
+    groups = [(group.name, spec.id) for spec in specialties
+              for group in backend.parse_groups_for_specialty(document, spec.id)]
+    snapshot = build_schedule_snapshot(document, fetched_at=0, backend=backend)
+
+    def all_groups():
+        for spec in specialties:
+            backend.parse_groups_for_specialty(document, spec.id)
+
+    def all_schedules():
+        for group_name, specialty_id in groups:
+            backend.parse_schedule_for_group(document, group_name, specialty_id)
+
+    def all_specialties():
+        for spec in specialties:
+            backend.parse_specialty(document, spec.id)
+
+    return [
+        Case("parse_document", lambda: backend.parse_document(html)),
+        Case("parse_week_info", lambda: backend.parse_week_info(document)),
+        Case("parse_specialties", lambda: backend.parse_specialties(document)),
+        Case("parse_groups_for_specialty", all_groups, len(specialties)),
+        Case("parse_schedule_for_group", all_schedules, len(groups)),
+        Case("parse_specialty", all_specialties, len(specialties)),
+        Case("build_teacher_index", lambda: build_teacher_index(snapshot.schedules)),
+        Case("build_schedule_snapshot", lambda: build_schedule_snapshot(document, fetched_at=0, backend=backend)),
+        Case("parse_schedule_page", lambda: parse_schedule_page(html, fetched_at=0, backend_name=backend_name(backend))),
+    ]
+
+
+def replacements_cases(html: str, backend) -> list[Case]:
+    document = backend.parse_document(html)
+    snapshot = build_replacements_snapshot(html, fetched_at=0, backend_name=backend_name(backend))
+
+    def group_index():
+        snapshot._bodies.pop("replacements:index", None)
+        snapshot.group_index()
+
+    return [
+        Case("parse_document", lambda: backend.parse_document(html)),
+        Case("parse_replacements", lambda: backend.parse_replacements(document)),
+        Case("group_index", group_index),
+        Case("build_replacements_snapshot",
+             lambda: build_replacements_snapshot(html, fetched_at=0, backend_name=backend_name(backend))),
+    ]
+
+
+def effective_cases(schedule_html: str, replacements_html: str, backend) -> list[Case]:
+    schedule = parse_schedule_page(schedule_html, fetched_at=0, backend_name=backend_name(backend))
+    replacements = build_replacements_snapshot(replacements_html, fetched_at=0, backend_name=backend_name(backend))
+    return [Case("EffectiveIndex", lambda: EffectiveIndex(schedule, replacements))]
+
+
+def backend_name(backend) -> str:
+    return next(name for name, module in PARSER_BACKENDS.items() if module is backend)
+
+
+def measure(case: Case, repeat: int) -> dict:
+    """Время одного вызова (мс) и пик памяти за один прогон (КиБ)"""
+    # Прогрев (ленивые импорты, кеши re и т.п.); медленным операциям хватает одного прогона на замер
+    started = time.perf_counter()
+    case.run()
+    elapsed = time.perf_counter() - started
+
+    # Сколько прогонов нужно, чтобы замер длился не меньше MIN_SAMPLE_SECONDS
+    number = 1
+    while elapsed < MIN_SAMPLE_SECONDS and number < 1000:
+        number *= 10
+        started = time.perf_counter()
+        for _ in range(number):
+            case.run()
+        elapsed = time.perf_counter() - started
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            case.run()
+        samples.append((time.perf_counter() - started) / number / case.calls * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "calls": case.calls,
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+
+def collect_cases(backends: list[str], pattern: str) -> dict[str, Case]:
+    """Ключ вида "schedule_large.html/lxml/parse_specialty" -> операция"""
+    cases = {}
+    schedule_pages = sorted(FIXTURES.glob(f"schedule{pattern}.html"))
+    replacements_pages = sorted(FIXTURES.glob(f"replacements{pattern}.html"))
+
+    for name in backends:
+        backend = PARSER_BACKENDS[name]
+        for page in schedule_pages:
+            for case in schedule_cases(page.read_text(encoding="utf-8"), backend):
+                cases[f"{page.name}/{name}/{case.name}"] = case
+        for page in replacements_pages:
+            for case in replacements_cases(page.read_text(encoding="utf-8"), backend):
+                cases[f"{page.name}/{name}/{case.name}"] = case
+            # Наложение замен — на расписание с тем же суффиксом (replacements_large -> schedule_large)
+            schedule_page = FIXTURES / page.name.replace("replacements", "schedule", 1)
+            if schedule_page in schedule_pages:
+                for case in effective_cases(schedule_page.read_text(encoding="utf-8"),
+                                            page.read_text(encoding="utf-8"), backend):
+                    cases[f"{page.name}/{name}/{case.name}"] = case
+    return cases
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Ключи, у которых время (по минимуму) или память выросли больше чем на threshold"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result["min_ms"] > base["min_ms"] * (1 + threshold) and \
+                result["min_ms"] - base["min_ms"] >= MIN_REGRESSION_MS:
+            regressions.append(key)
+        elif result["peak_kib"] > base["peak_kib"] * (1 + threshold) + 16:
+            regressions.append(key)
+    return regressions
+
+
+def print_results(results: dict, baseline: Optional[dict], regressions: list[str]):
+    header = f"{'операция':<64} {'вызовов':>7} {'мин, мс':>10} {'медиана, мс':>12} {'пик, КиБ':>10}"
+    if baseline is not None:
+        header += f" {'время':>7} {'память':>7}"
+    print(header)
+
+    for key, result in results.items():
+        line = (f"{key:<64} {result['calls']:>7} {result['min_ms']:>10.4f} "
+                f"{result['median_ms']:>12.4f} {result['peak_kib']:>10.1f}")
+        base = baseline.get(key) if baseline is not None else None
+        if base is not None:
+            time_ratio = result["min_ms"] / base["min_ms"] if base["min_ms"] else 1.0
+            memory_ratio = result["peak_kib"] / base["peak_kib"] if base["peak_kib"] else 1.0
+            line += f" {time_ratio:>6.2f}x {memory_ratio:>6.2f}x"
+            if key in regressions:
+                line += "  РЕГРЕССИЯ"
+        print(line)
+
+
+def main() -> int:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("--backend", nargs="+", choices=sorted(PARSER_BACKENDS), default=sorted(PARSER_BACKENDS),
+                           help="парсеры для замера (по умолчанию все)")
+    arguments.add_argument("--pages", default="*",
+                           help="суффикс страниц fixtures/, например _large (по умолчанию все)")
+    arguments.add_argument("--repeat", type=int, default=5, help="число замеров на операцию")
+    arguments.add_argument("--save", type=Path, help="сохранить результаты как базовые в JSON")
+    arguments.add_argument("--compare", type=Path, help="сравнить с базовыми результатами из JSON")
+    arguments.add_argument("--threshold", type=float, default=0.2,
+                           help="допустимый рост времени и памяти (0.2 = 20%%)")
+    args = arguments.parse_args()
+
+    results = {}
+    for key, case in collect_cases(args.backend, args.pages).items():
+        results[key] = measure(case, args.repeat)
+
+    baseline = None
+    regressions = []
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold)
+
+    print_results(results, baseline, regressions)
+
+    if args.save:
+        args.save.write_text(json.dumps({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "results": results
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nБазовые результаты сохранены в {args.save}")
+
+    if regressions:
+        print(f"\nРегрессий: {len(regressions)} (порог {args.threshold:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from snapshot import ScheduleSnapshot, ReplacementsSnapshot
+
+
+@dataclass
+class SyncState:
+    """Хеши всего, что клиент держит у себя, для одной версии данных"""
+    version: int
+    snapshots: tuple[int, int]            # (версия расписания, версия замен), из которых построено состояние
+    week_info: str
+    specialties: str
+    groups: dict[tuple[str, str], str]    # (specialty_id, группа) -> хеш расписания
+    replacements: dict[str, str]          # группа -> хеш замен
+
+
+def build_sync_state(version: int, schedule: ScheduleSnapshot, replacements: ReplacementsSnapshot) -> SyncState:
+    return SyncState(
+        version=version,
+        snapshots=(schedule.version, replacements.version),
+        week_info=schedule.week_info.model_dump_json(),
+        specialties=schedule.specialties_hash(),
+        groups=schedule.group_hashes(),
+        replacements=replacements.group_hashes()
+    )
+
+
+def _diff_keys(old: dict, new: dict) -> tuple[list, list]:
+    """Ключи, которые добавились или изменились, и ключи, которые пропали"""
+    changed = [key for key, value in new.items() if old.get(key) != value]
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+
+class ChangeLog:
+    """
+    Последние опубликованные версии данных.
+
+    Версия данных выдаётся один раз на пару (версия расписания, версия замен)
+    и растёт с каждой новой парой. Из самих версий снимков её не вывести:
+    расписание получает версию до разбора, а разбирается дольше замен, поэтому
+    порядок публикации и версий снимков не совпадает. allocate(версия расписания,
+    версия замен) выдаёт версию пары из общего хранилища — тогда она одна у всех
+    воркеров; без него (или если он вернул None) версии выдаются локально.
+
+    Состояние записывается при каждой публикации снимка (а не при первом
+    запросе). Для версии хранятся только хеши (несколько килобайт), и ответ
+    на /api/changes?since= — это сравнение двух словарей. Если версия since
+    уже вытеснена или неизвестна, клиенту нужна полная синхронизация.
+    """
+
+    def __init__(self, limit: int, allocate: Optional[Callable[[int, int], Optional[int]]] = None):
+        self.limit = limit
+        self._allocate = allocate
+        self._states: OrderedDict[int, SyncState] = OrderedDict()
+        self._versions: dict[tuple[int, int], int] = {}     # (версия расписания, версия замен) -> версия данных
+        self._last_local = 0
+
+    def _next_local(self) -> int:
+        """Локальная версия: время в мс, но строго больше предыдущей (как next_version у снимков)"""
+        self._last_local = max(self._last_local + 1, int(time.time() * 1000))
+        return self._last_local
+
+    def current(self, schedule: ScheduleSnapshot, replacements: ReplacementsSnapshot) -> SyncState:
+        """Состояние для пары снимков (версия выдаётся и состояние строится один раз на пару)"""
+        pair = (schedule.version, replacements.version)
+        version = self._versions.get(pair)
+        if version is not None:
+            return self._states[version]
+
+        version = self._allocate(*pair) if self._allocate is not None else None
+        if version is None:
+            version = self._next_local()
+        state = self._states[version] = build_sync_state(version, schedule, replacements)
+        self._versions[pair] = version
+        while len(self._states) > self.limit:
+            _, evicted = self._states.popitem(last=False)
+            self._versions.pop(evicted.snapshots, None)
+        return state
+
+    def changes(self, since: int, current: SyncState) -> dict:
+        """Что изменилось с версии since до current"""
+        old: Optional[SyncState] = self._states.get(since)
+        if old is None:
+            return {"version": current.version, "full_resync": True}
+
+        groups_changed, groups_removed = _diff_keys(old.groups, current.groups)
+        replacements_changed, replacements_removed = _diff_keys(old.replacements, current.replacements)
+        return {
+            "version": current.version,
+            "full_resync": False,
+            "week_info_changed": old.week_info != current.week_info,
+            "specialties_changed": old.specialties != current.specialties,
+            "groups": {
+                "changed": [{"group": group, "specialty_id": spec} for spec, group in groups_changed],
+                "removed": [{"group": group, "specialty_id": spec} for spec, group in groups_removed]
+            },
+            "replacements": {
+                "changed": replacements_changed,
+                "removed": replacements_removed
+            }
+        }
@@ -0,0 +1,124 @@
+import os
+from pathlib import Path
+
+
+# Настройки сервера. Любое значение можно переопределить переменной окружения,
+# например MPT_SCHEDULE_SOFT_TTL=600 python main.py
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+# MARK: - Кеш расписания
+# После SOFT_TTL запрос получает старый снимок, а обновление запускается в фоне.
+# После HARD_TTL запрос ждёт свежие данные (обновление всё равно одно на всех).
+
+SCHEDULE_SOFT_TTL = _env_float("MPT_SCHEDULE_SOFT_TTL", 300)
+SCHEDULE_HARD_TTL = _env_float("MPT_SCHEDULE_HARD_TTL", 3600)
+
+# MARK: - Кеш замен (обновляются чаще)
+
+REPLACEMENTS_SOFT_TTL = _env_float("MPT_REPLACEMENTS_SOFT_TTL", 120)
+REPLACEMENTS_HARD_TTL = _env_float("MPT_REPLACEMENTS_HARD_TTL", 900)
+
+# MARK: - Фоновое обновление
+# Страницы обновляются в фоне раз в *_REFRESH_INTERVAL секунд (± REFRESH_JITTER),
+# запросы отвечают последним удачным снимком и mpt.ru не ждут.
+# Снимок старше HARD_TTL или с ошибкой последнего обновления помечается X-Data-Stale.
+
+SCHEDULE_REFRESH_INTERVAL = _env_float("MPT_SCHEDULE_REFRESH_INTERVAL", SCHEDULE_SOFT_TTL)
+REPLACEMENTS_REFRESH_INTERVAL = _env_float("MPT_REPLACEMENTS_REFRESH_INTERVAL", REPLACEMENTS_SOFT_TTL)
+REFRESH_JITTER = _env_float("MPT_REFRESH_JITTER", 0.1)
+
+# После BREAKER_FAILURES ошибок подряд страница не запрашивается BREAKER_RESET_TIMEOUT секунд
+BREAKER_FAILURES = int(_env_float("MPT_BREAKER_FAILURES", 3))
+BREAKER_RESET_TIMEOUT = _env_float("MPT_BREAKER_RESET_TIMEOUT", 60)
+
+# MARK: - Подписка на замены (SSE)
+# Пока есть подписчики, кеш замен проверяется раз в SSE_POLL_INTERVAL секунд
+# (страница загружается по-прежнему не чаще REPLACEMENTS_SOFT_TTL)
+
+SSE_POLL_INTERVAL = _env_float("MPT_SSE_POLL_INTERVAL", 10)
+SSE_PING_INTERVAL = _env_float("MPT_SSE_PING_INTERVAL", 20)
+SSE_MAX_SUBSCRIBERS = int(_env_float("MPT_SSE_MAX_SUBSCRIBERS", 10000))
+
+# MARK: - Контент приложения
+# Рекомендации, новости и подборки читаются из JSON-файлов каталога CONTENT_DIR
+# и перечитываются, если файлы изменились (проверка раз в CONTENT_RELOAD_INTERVAL
+# секунд, 0 — не следить за файлами)
+
+CONTENT_DIR = Path(os.environ.get("MPT_CONTENT_DIR") or Path(__file__).parent / "content")
+CONTENT_RELOAD_INTERVAL = _env_float("MPT_CONTENT_RELOAD_INTERVAL", 5)
+
+# MARK: - Кеширование на клиенте
+# Сколько клиент может не перепроверять статичный контент (/api/content/*)
+
+CONTENT_MAX_AGE = _env_float("MPT_CONTENT_MAX_AGE", 300)
+
+# Ответы меньше этого размера (байт) не сжимаются — выигрыш меньше накладных расходов
+COMPRESS_MIN_SIZE = int(_env_float("MPT_COMPRESS_MIN_SIZE", 1024))
+
+# Бюджет памяти LRU-кеша готовых ответов (тела + сжатые варианты), байт
+RESPONSE_CACHE_MAX_BYTES = int(_env_float("MPT_RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Сколько последних версий данных помнит /api/changes (по каждой — только хеши групп);
+# клиенту с более старой версией придётся загрузить всё заново
+CHANGES_HISTORY = int(_env_float("MPT_CHANGES_HISTORY", 50))
+
+# MARK: - Загрузка страниц mpt.ru
+# Адреса страниц можно заменить, например, на локальную копию (load_test.py)
+
+BASE_URL = os.environ.get("MPT_BASE_URL", "https://mpt.ru/raspisanie/")
+REPLACEMENTS_URL = os.environ.get("MPT_REPLACEMENTS_URL", "https://mpt.ru/izmeneniya-v-raspisanii/")
+
+# Один HTTP-клиент на всё время жизни приложения (keep-alive, HTTP/2)
+
+UPSTREAM_TIMEOUT = _env_float("MPT_UPSTREAM_TIMEOUT", 30)
+UPSTREAM_CONNECT_TIMEOUT = _env_float("MPT_UPSTREAM_CONNECT_TIMEOUT", 10)
+UPSTREAM_HTTP2 = _env_bool("MPT_UPSTREAM_HTTP2", True)
+UPSTREAM_MAX_CONNECTIONS = int(_env_float("MPT_UPSTREAM_MAX_CONNECTIONS", 10))
+UPSTREAM_MAX_KEEPALIVE = int(_env_float("MPT_UPSTREAM_MAX_KEEPALIVE", 5))
+UPSTREAM_KEEPALIVE_EXPIRY = _env_float("MPT_UPSTREAM_KEEPALIVE_EXPIRY", 60)
+
+# Повторы при сетевых ошибках и 5xx/429: пауза случайная от 0 до
+# min(BACKOFF_MAX, BACKOFF_BASE * 2^попытка)
+UPSTREAM_RETRIES = int(_env_float("MPT_UPSTREAM_RETRIES", 2))
+UPSTREAM_BACKOFF_BASE = _env_float("MPT_UPSTREAM_BACKOFF_BASE", 0.5)
+UPSTREAM_BACKOFF_MAX = _env_float("MPT_UPSTREAM_BACKOFF_MAX", 5)
+
+# MARK: - Снимки на диске
+# SQLite-файл с последними снимками для быстрого старта (пустое значение — отключить)
+
+SNAPSHOT_DB_PATH = os.environ.get("MPT_SNAPSHOT_DB", "snapshots.db")
+
+# MARK: - Несколько воркеров
+# Воркеры делят SNAPSHOT_DB_PATH: лидер загружает mpt.ru и публикует снимки,
+# остальные раз в SHARED_POLL_INTERVAL секунд подхватывают новые версии
+
+WORKERS = int(_env_float("MPT_WORKERS", 1))
+SHARED_POLL_INTERVAL = _env_float("MPT_SHARED_POLL_INTERVAL", 2)
+SHARED_WAIT_TIMEOUT = _env_float("MPT_SHARED_WAIT_TIMEOUT", 30)
+
+# MARK: - Парсинг
+# Где разбирать HTML: "thread" — пул потоков, "process" — пул процессов,
+# "inline" — прямо в event loop (как раньше, для сравнения метрик)
+
+PARSE_EXECUTOR = os.environ.get("MPT_PARSE_EXECUTOR", "thread")
+PARSE_WORKERS = int(_env_float("MPT_PARSE_WORKERS", 2))
+
+# MARK: - Метрики
+# Период опроса event loop для измерения его блокировок
+
+LOOP_LAG_INTERVAL = _env_float("MPT_LOOP_LAG_INTERVAL", 0.05)
+
+# Реализация парсера: "bs4" (parser.py) или "lxml" (parser_lxml.py, быстрее)
+PARSER_BACKEND = os.environ.get("MPT_PARSER_BACKEND", "bs4")
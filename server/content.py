@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from http_cache import PreparedBody, encode_json
+from metrics import increment
+
+
+# Раздел контента -> файл в каталоге контента (в ответе раздел — ключ со списком)
+SECTIONS = {
+    "advertisements": "advertisements.json",
+    "news": "news.json",
+    "collections": "resource_collections.json"
+}
+
+
+@dataclass(frozen=True)
+class Content:
+    """Загруженный контент: готовые тела всех /api/content/* ответов"""
+    version: str                         # Хеш содержимого всех разделов
+    timestamp: str                       # Время последнего изменения файлов (ISO 8601, UTC)
+    sections: dict[str, PreparedBody]    # раздел -> {"<раздел>": [...]}
+    version_body: PreparedBody           # {"version": ..., "timestamp": ...}
+    bundle: PreparedBody                 # {"version": ..., "<раздел>": [...], ...}
+    signature: tuple                     # (файл, mtime_ns, размер) — по ней видно изменение файлов
+
+
+def _signature(directory: Path) -> tuple:
+    signature = []
+    for filename in SECTIONS.values():
+        stat = (directory / filename).stat()
+        signature.append((filename, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def load_content(directory: Path) -> Content:
+    """Читает все разделы и сериализует ответы (ValueError, если файл некорректен)"""
+    signature = _signature(directory)
+    items = {}
+    for section, filename in SECTIONS.items():
+        try:
+            data = json.loads((directory / filename).read_text(encoding="utf-8"))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{filename}: {e}") from e
+        if not isinstance(data, list):
+            raise ValueError(f"{filename}: ожидается JSON-массив")
+        items[section] = data
+
+    sections = {section: PreparedBody(encode_json({section: data})) for section, data in items.items()}
+    digest = hashlib.sha256()
+    for body in sections.values():
+        digest.update(body.body)
+    version = digest.hexdigest()[:12]
+
+    modified = max(mtime_ns for _, mtime_ns, _ in signature) / 1e9
+    timestamp = datetime.fromtimestamp(modified, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    return Content(
+        version=version,
+        timestamp=timestamp,
+        sections=sections,
+        version_body=PreparedBody(encode_json({"version": version, "timestamp": timestamp})),
+        # ETag пакета зависит только от содержимого, а не от времени файлов
+        bundle=PreparedBody(encode_json({"version": version, **items}), f'"content-{version}"'),
+        signature=signature
+    )
+
+
+class ContentStore:
+    """
+    Контент приложения (рекомендации, новости, подборки) из файлов.
+
+    Файлы читаются и сериализуются один раз на изменение: запросы получают
+    готовые байты. Версия — хеш содержимого, поэтому её не нужно менять
+    вручную. watch() перечитывает файлы, когда меняется их mtime или размер;
+    если новый файл некорректен, продолжает отдаваться прежний контент.
+    """
+
+    def __init__(self, directory: Path, on_change: Optional[Callable[[Content], None]] = None):
+        self.directory = directory
+        self._on_change = on_change     # Вызывается, когда меняется версия контента
+        self.loaded_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._content: Optional[Content] = None
+        self._failed_signature: Optional[tuple] = None   # Файлы, которые не удалось загрузить
+
+    @property
+    def current(self) -> Content:
+        if self._content is None:
+            self.reload()
+        return self._content
+
+    def reload(self):
+        content = load_content(self.directory)
+        changed = self._content is None or content.version != self._content.version
+        if changed:
+            print(f"Контент загружен, версия {content.version}")
+        self._content = content
+        self.loaded_at = time.time()
+        self.last_error = None
+        increment("content.reloads")
+        if changed and self._on_change is not None:
+            self._on_change(content)
+
+    def reload_if_changed(self) -> bool:
+        """Перечитывает файлы, если они изменились; True — если перечитаны"""
+        signature = None
+        try:
+            signature = _signature(self.directory)
+            if self._content is not None and signature == self._content.signature:
+                return False
+            if signature == self._failed_signature:
+                return False        # Ошибка уже известна, ждём следующего изменения файлов
+            self.reload()
+            self._failed_signature = None
+            return True
+        except (OSError, ValueError) as e:
+            self._failed_signature = signature
+            self.last_error = str(e)
+            increment("content.errors")
+            print(f"Ошибка загрузки контента: {e}")
+            return False
+
+    async def watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.reload_if_changed()
+
+    def to_dict(self) -> dict:
+        return {
+            "directory": str(self.directory),
+            "version": self._content.version if self._content is not None else None,
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,179 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from models import (
+    WeekType, WeekSchedule, Replacement, EffectiveLesson, EffectiveDay, EffectiveSchedule
+)
+from parser import DAYS_NAMES
+from snapshot import ScheduleSnapshot, ReplacementsSnapshot
+
+
+DATE_FORMAT = "%d.%m.%Y"
+
+# Даты на mpt.ru — московские. Сервер (Render) работает в UTC, поэтому локальная
+# дата процесса с полуночи до 3:00 МСК — ещё вчерашняя. Перехода на летнее время
+# в Москве нет, фиксированного смещения достаточно (и не нужен tzdata).
+MOSCOW = timezone(timedelta(hours=3), "MSK")
+
+MONTHS = ["Января", "Февраля", "Марта", "Апреля", "Мая", "Июня",
+          "Июля", "Августа", "Сентября", "Октября", "Ноября", "Декабря"]
+
+
+def parse_date(value: str) -> date:
+    """Дата в формате страницы замен: "28.11.2025" """
+    return datetime.strptime(value.strip(), DATE_FORMAT).date()
+
+
+def format_date(value: date) -> str:
+    return value.strftime(DATE_FORMAT)
+
+
+def moscow_date(timestamp: Optional[float] = None) -> date:
+    """Московская дата момента timestamp (по умолчанию — сейчас)"""
+    return datetime.fromtimestamp(time.time() if timestamp is None else timestamp, MOSCOW).date()
+
+
+def page_date(snapshot: ScheduleSnapshot) -> date:
+    """
+    Дата, к которой относится week_info: "27 Ноября - Четверг" со страницы.
+
+    Года на странице нет — берётся ближайший к московской дате загрузки.
+    Если дату разобрать не удалось, используется сама московская дата загрузки.
+    """
+    fetched = moscow_date(snapshot.fetched_at)
+    parts = snapshot.week_info.date.split()
+    if len(parts) >= 2 and parts[0].isdigit() and parts[1] in MONTHS:
+        day, month = int(parts[0]), MONTHS.index(parts[1]) + 1
+        candidates = []
+        for year in (fetched.year - 1, fetched.year, fetched.year + 1):
+            try:
+                candidates.append(date(year, month, day))
+            except ValueError:
+                continue        # 29 февраля не в високосный год
+        if candidates:
+            return min(candidates, key=lambda candidate: abs(candidate - fetched))
+    return fetched
+
+
+def week_type_on(day: date, snapshot: ScheduleSnapshot) -> WeekType:
+    """
+    Числитель/знаменатель для даты.
+
+    week_info относится к неделе даты со страницы (page_date), дальше
+    недели чередуются.
+    """
+    reference = page_date(snapshot)
+    weeks = ((day - timedelta(days=day.weekday())) - (reference - timedelta(days=reference.weekday()))).days // 7
+    if weeks % 2 == 0:
+        return snapshot.week_info.week_type
+    if snapshot.week_info.week_type == WeekType.NUMERATOR:
+        return WeekType.DENOMINATOR
+    return WeekType.NUMERATOR
+
+
+def _is_cancelled(subject: str) -> bool:
+    return "отмен" in subject.lower()
+
+
+def build_effective_day(schedule: WeekSchedule, day: date, week_type: WeekType,
+                        replacements: list[Replacement]) -> EffectiveDay:
+    """День группы по расписанию с наложенными заменами"""
+    base = next((d for d in schedule.days if d.day_index == day.weekday()), None)
+
+    lessons: dict[int, EffectiveLesson] = {}
+    if base is not None:
+        for lesson in base.lessons:
+            if week_type == WeekType.DENOMINATOR:
+                subject = lesson.subject_denominator or lesson.subject
+                teacher = lesson.teacher_denominator or lesson.teacher
+            else:
+                subject, teacher = lesson.subject, lesson.teacher
+            lessons[lesson.number] = EffectiveLesson(number=lesson.number, subject=subject, teacher=teacher)
+
+    for replacement in replacements:
+        lessons[replacement.pair_number] = EffectiveLesson(
+            number=replacement.pair_number,
+            subject=replacement.new_subject,
+            teacher="",
+            is_replaced=True,
+            is_cancelled=_is_cancelled(replacement.new_subject),
+            original_subject=replacement.original_subject,
+            replaced_at=replacement.added_at
+        )
+
+    day_index = day.weekday()
+    return EffectiveDay(
+        date=format_date(day),
+        day=DAYS_NAMES[day_index] if day_index < len(DAYS_NAMES) else "ВОСКРЕСЕНЬЕ",
+        day_index=day_index,
+        week_type=week_type,
+        campus=base.campus if base is not None else None,
+        has_replacements=bool(replacements),
+        lessons=[lessons[number] for number in sorted(lessons)],
+        is_day_off=all(lesson.is_cancelled for lesson in lessons.values())
+    )
+
+
+class EffectiveIndex:
+    """
+    Расписание с заменами, индексированное по (группа, дата).
+
+    Строится один раз на пару снимков (расписание, замены): дни, на которые
+    у группы есть замены, вычисляются сразу при построении; дни без замен —
+    при первом запросе, и тоже запоминаются.
+    """
+
+    def __init__(self, schedule: ScheduleSnapshot, replacements: ReplacementsSnapshot):
+        self.schedule = schedule
+        self.replacements = replacements
+        self._days: dict[tuple[str, str, str], EffectiveDay] = {}
+
+        # Дни страницы замен с корректной датой (на даты вида "32.13.2025" наложить нечего)
+        days = replacements.replacements.days
+        valid_days = set()
+        for day_pos, day in enumerate(days):
+            try:
+                parse_date(day.date)
+            except ValueError:
+                continue
+            valid_days.add(day_pos)
+        self.dates = [days[day_pos].date for day_pos in sorted(valid_days)]
+
+        # (specialty_id, группа, дата) -> замены; группы ищутся по индексу токенов
+        self._replacements: dict[tuple[str, str, str], list[Replacement]] = {}
+        for specialty_id, group_schedules in schedule.schedules.items():
+            for group_name in group_schedules:
+                for day_pos, group_pos in replacements.group_tables(group_name):
+                    if day_pos in valid_days:
+                        self._replacements.setdefault(
+                            (specialty_id, group_name, days[day_pos].date), []
+                        ).extend(days[day_pos].groups[group_pos].replacements)
+
+        for specialty_id, group_name, day in list(self._replacements):
+            self.day(specialty_id, group_name, parse_date(day))
+
+    def is_for(self, schedule: ScheduleSnapshot, replacements: ReplacementsSnapshot) -> bool:
+        return self.schedule is schedule and self.replacements is replacements
+
+    def day(self, specialty_id: str, group_name: str, day: date) -> Optional[EffectiveDay]:
+        """День группы с заменами или None, если группы нет в расписании"""
+        key = (specialty_id, group_name, format_date(day))
+        effective = self._days.get(key)
+        if effective is None:
+            schedule = self.schedule.get_schedule(group_name, specialty_id)
+            if schedule is None:
+                return None
+            effective = self._days[key] = build_effective_day(
+                schedule, day, week_type_on(day, self.schedule), self._replacements.get(key, [])
+            )
+        return effective
+
+    def schedule_for(self, specialty_id: str, group_name: str, days: list[date]) -> Optional[EffectiveSchedule]:
+        if self.schedule.get_schedule(group_name, specialty_id) is None:
+            return None
+        return EffectiveSchedule(
+            group=group_name,
+            specialty_id=specialty_id,
+            days=[self.day(specialty_id, group_name, day) for day in days]
+        )
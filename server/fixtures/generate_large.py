@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Генерирует большие страницы для бенчмарка (schedule_large.html, replacements_large.html).
+
+Разметка — как в написанных вручную schedule.html и replacements.html (по образцу mpt.ru),
+объём и состав — как у полного расписания колледжа: 12 специальностей
+по 25 групп с кириллическими названиями (часть — составные, как
+"Э-1-22, Э-11/1-23"), несколько сотен преподавателей и замены на неделю,
+в том числе общие для двух групп и на одну группу из составного названия.
+Генератор детерминирован (фиксированный seed), поэтому страницы можно
+пересоздать, и результаты бенчмарка остаются сравнимыми.
+
+Запуск: python fixtures/generate_large.py
+"""
+import hashlib
+import random
+from pathlib import Path
+
+
+FIXTURES = Path(__file__).parent
+
+DAYS = ["ПОНЕДЕЛЬНИК", "ВТОРНИК", "СРЕДА", "ЧЕТВЕРГ", "ПЯТНИЦА", "СУББОТА"]
+CAMPUSES = ["Нежинская", "Нахимовский", ""]
+SUBJECTS = [
+    "Элементы высшей математики", "Физика", "Химия", "Информатика", "История", "Английский язык",
+    "Физическая культура", "Основы алгоритмизации и программирования", "Дискретная математика",
+    "Операционные системы и среды", "Компьютерные сети", "Архитектура аппаратных средств",
+    "Основы проектирования баз данных", "Технология разработки программного обеспечения",
+    "Инструментальные средства разработки ПО", "Экономика организации", "Правовое обеспечение",
+    "Безопасность жизнедеятельности", "Русский язык", "Литература", "Обществознание",
+    "Теория вероятностей и математическая статистика", "Численные методы", "Электротехника",
+    "Менеджмент в профессиональной деятельности", "Стандартизация, сертификация и техническое документоведение",
+    "Информационные технологии", "Психология общения", "Гражданское право", "Бухгалтерский учёт"
+]
+
+# Специальности mpt.ru: код и отделения (буквы в названиях групп)
+SPECIALTIES = [
+    ("09.02.01", ["Э"]), ("09.02.07", ["ИС", "БД", "ВД"]), ("09.02.06", ["СА"]), ("10.02.05", ["БИ"]),
+    ("40.02.01", ["Ю"]), ("38.02.01", ["БУ"]), ("11.02.15", ["Т"]), ("09.02.03", ["П"]),
+    ("42.02.01", ["Р"]), ("38.02.03", ["ОЛ"]), ("11.02.11", ["С"]), ("10.02.04", ["ОИБ"])
+]
+GROUPS_PER_SPECIALTY = 25
+TEACHERS_COUNT = 400
+
+SURNAMES = [
+    "Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Васильев", "Соколов", "Михайлов",
+    "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов", "Егоров", "Павлов",
+    "Козлов", "Степанов", "Николаев", "Орлов", "Андреев", "Макаров", "Никитин", "Захаров", "Зайцев",
+    "Соловьёв", "Борисов", "Яковлев", "Григорьев", "Романов", "Воробьёв", "Сергеев", "Кузьмин",
+    "Фролов", "Александров", "Дмитриев", "Королёв", "Гусев", "Киселёв", "Ильин", "Максимов", "Поляков",
+    "Сорокин", "Виноградов", "Ковалёв", "Белов", "Медведев", "Антонов", "Тарасов", "Жуков", "Баранов",
+    "Филиппов", "Комаров", "Давыдов", "Беляев", "Герасимов", "Богданов", "Осипов"
+]
+INITIALS = "АБВГДЕИКЛМНОПРСТЮЯ"
+
+
+def _teachers(rng: random.Random) -> list[str]:
+    """Преподаватели вида "Т.А. Кузнецова" (мужские и женские фамилии)"""
+    teachers = set()
+    while len(teachers) < TEACHERS_COUNT:
+        surname = rng.choice(SURNAMES)
+        if rng.random() < 0.5:
+            surname += "а"
+        teachers.add(f"{rng.choice(INITIALS)}.{rng.choice(INITIALS)}. {surname}")
+    return sorted(teachers)
+
+
+def _teacher_cell(rng: random.Random, teachers: list[str]) -> str:
+    # Часть пар ведут двое преподавателей (подгруппы)
+    if rng.random() < 0.1:
+        return ", ".join(rng.sample(teachers, 2))
+    return rng.choice(teachers)
+
+
+def _lesson_row(rng: random.Random, teachers: list[str], number: int) -> str:
+    if rng.random() < 0.3:
+        # Пара по числителю/знаменателю
+        return (
+            f'<tr><td>{number}</td>'
+            f'<td><div class="label label-danger">{rng.choice(SUBJECTS)}</div>'
+            f'<div class="label label-info">{rng.choice(SUBJECTS)}</div></td>'
+            f'<td><div class="label label-danger">{rng.choice(teachers)}</div>'
+            f'<div class="label label-info">{rng.choice(teachers)}</div></td></tr>'
+        )
+    return f'<tr><td>{number}</td><td>{rng.choice(SUBJECTS)}</td><td>{_teacher_cell(rng, teachers)}</td></tr>'
+
+
+def _day_table(rng: random.Random, teachers: list[str], day: str) -> str:
+    rows = "".join(_lesson_row(rng, teachers, number) for number in range(1, rng.randint(2, 5)))
+    return (
+        '<table class="table table-striped table-hover">\n'
+        f'<thead><tr><th colspan="3"><h4>{day} <span>{rng.choice(CAMPUSES)}</span></h4></th></tr>\n'
+        '<tr><th>Пара</th><th>Предмет</th><th>Преподаватель</th></tr></thead>\n'
+        f'<tbody>{rows}</tbody></table>'
+    )
+
+
+def _group_names(rng: random.Random, departments: list[str]) -> list[str]:
+    """
+    Группы специальности: "ИС-1-23", "БД-2-24"... Часть — составные, как на mpt.ru:
+    "Э-1-22, Э-11/1-23" (группа и присоединённая к ней подгруппа другого набора).
+    """
+    names = []
+    for year in (25, 24, 23, 22):
+        for number in range(1, 8):
+            for department in departments:
+                name = f"{department}-{number}-{year}"
+                if year < 25 and rng.random() < 0.15:
+                    name += f", {department}-{number}{rng.randint(1, 3)}/{rng.randint(1, 2)}-{year + 1}"
+                names.append(name)
+    return names[:GROUPS_PER_SPECIALTY]
+
+
+def _tab_id(name: str) -> str:
+    # Идентификаторы вкладок на mpt.ru — хеши
+    return hashlib.md5(name.encode()).hexdigest()
+
+
+def generate_schedule(rng: random.Random, teachers: list[str]) -> tuple[str, list[tuple[str, str, list[str]]]]:
+    """HTML страницы расписания и список специальностей (id вкладки, название, группы)"""
+    specialties = [
+        (_tab_id(code), f"{code} {', '.join(departments)}", _group_names(rng, departments))
+        for code, departments in SPECIALTIES
+    ]
+
+    parts = [
+        '<html><head><meta charset="utf-8"></head><body>'
+        '<h2>27 Ноября - Четверг</h2><h3>Неделя: <span class="label label-info">Знаменатель</span></h3>',
+        '<ul class="nav nav-tabs">' +
+        "".join(f'<li><a href="#{tab_id}">{name}</a></li>' for tab_id, name, _ in specialties) +
+        '</ul><div class="tab-content">'
+    ]
+    for tab_id, name, groups in specialties:
+        parts.append(
+            f'<div class="tab-pane" id="{tab_id}"><h2>Расписание занятий для {name}</h2><ul class="nav nav-tabs">' +
+            "".join(f'<li><a href="#{_tab_id(tab_id + group)}">{group}</a></li>' for group in groups) +
+            '</ul><div class="tab-content">'
+        )
+        for group in groups:
+            parts.append(
+                f'<div class="tab-pane" id="{_tab_id(tab_id + group)}"><h3>Группа {group}</h3>' +
+                "".join(_day_table(rng, teachers, day) for day in rng.sample(DAYS, 4)) +
+                '</div>'
+            )
+        parts.append('</div></div>')
+    parts.append('</div></body></html>')
+    return "\n".join(parts), specialties
+
+
+def _caption(rng: random.Random, group: str, groups: list[str]) -> str:
+    tokens = [token.strip() for token in group.split(",")]
+    roll = rng.random()
+    if len(tokens) > 1 and roll < 0.4:
+        # Замена только для одной группы из составного названия
+        return rng.choice(tokens)
+    if roll > 0.9:
+        # Общая замена на две группы, как на mpt.ru
+        return f"{group}, {rng.choice(groups)}"
+    return group
+
+
+def generate_replacements(rng: random.Random, teachers: list[str], groups: list[str]) -> str:
+    parts = [
+        '<!DOCTYPE html>\n<html lang="ru">\n<head><meta charset="utf-8"><title>Изменения в расписании | МПТ</title></head>\n'
+        '<body>\n<div class="container">\n  <h1>Изменения в расписании</h1>'
+    ]
+    for day in range(24, 31):
+        parts.append(f'  <h4>Замены на {day}.11.2025</h4>')
+        for group in sorted(rng.sample(groups, 60)):
+            rows = "".join(
+                f'<tr><td>{number}</td><td>{rng.choice(SUBJECTS)}<br>{rng.choice(teachers)}</td>'
+                f'<td>{rng.choice(SUBJECTS + ["Занятие отменено"])}</td><td>{day - 1}.11.2025 15:{number:02d}</td></tr>'
+                for number in sorted(rng.sample(range(1, 7), rng.randint(1, 3)))
+            )
+            parts.append(
+                '  <div class="table-responsive">\n    <table class="table table-striped table-hover">\n'
+                f'      <caption>Группа: <b>{_caption(rng, group, groups)}</b></caption>\n'
+                '      <tr><th>Номер пары</th><th>Что заменяют</th><th>На что заменяют</th><th>Когда добавлена замена</th></tr>\n'
+                f'      {rows}\n    </table>\n  </div>'
+            )
+    parts.append('</div>\n</body>\n</html>\n')
+    return "\n".join(parts)
+
+
+def main():
+    rng = random.Random(1)
+    teachers = _teachers(rng)
+    schedule, specialties = generate_schedule(rng, teachers)
+    groups = [group for _, _, names in specialties for group in names]
+    (FIXTURES / "schedule_large.html").write_text(schedule, encoding="utf-8")
+    (FIXTURES / "replacements_large.html").write_text(generate_replacements(rng, teachers, groups), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from metrics import increment
+import config
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него отдаём только gzip
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него сериализуем как FastAPI
+    orjson = None
+
+
+# Поддерживаемые сжатия в порядке предпочтения
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def make_etag(*parts: Any) -> str:
+    """Сильный ETag из частей ключа (маршрут, параметры, версия снимка)"""
+    key = "\x1f".join(str(part) for part in parts)
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def body_etag(body: bytes) -> str:
+    """Сильный ETag из хеша тела ответа"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag сжатого варианта: "abc" -> "abc-gzip" (разные байты — разные ETag)"""
+    if encoding is None:
+        return etag
+    return etag[:-1] + "-" + encoding + '"'
+
+
+def _base_etag(candidate: str) -> str:
+    """Убирает суффикс сжатия из ETag, присланного клиентом"""
+    for encoding in ENCODINGS:
+        suffix = "-" + encoding + '"'
+        if candidate.endswith(suffix):
+            return candidate[:-len(suffix)] + '"'
+    return candidate
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Совпадает ли ETag с If-None-Match (слабое сравнение, RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if _base_etag(candidate) == etag:
+            return True
+    return False
+
+
+def choose_encoding(request: Request) -> Optional[str]:
+    """Выбирает сжатие по Accept-Encoding с учётом q-значений (None — без сжатия)"""
+    header = request.headers.get("accept-encoding")
+    if not header:
+        return None
+
+    weights = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class PreparedBody:
+    """
+    Готовое тело JSON-ответа с ETag и лениво сжатыми вариантами.
+
+    Тела из снимков хранятся в ResponseCache (в пределах его бюджета памяти),
+    поэтому каждый вариант сжимается один раз на снимок, а не на каждый запрос.
+    """
+
+    def __init__(self, body: bytes, etag: Optional[str] = None, level: str = "max"):
+        self.body = body
+        self.etag = etag or body_etag(body)
+        self._level = level
+        self._encoded: dict[str, bytes] = {}
+        # Вызывается с размером нового сжатого варианта (учёт памяти в ResponseCache)
+        self.on_grow: Optional[Callable[[int], None]] = None
+
+    @property
+    def size(self) -> int:
+        """Сколько байт занимают тело и все сжатые варианты"""
+        return len(self.body) + sum(len(data) for data in self._encoded.values())
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """Тело в нужном сжатии (сжимается при первом обращении)"""
+        if encoding is None:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = _compress(self.body, encoding, self._level)
+            if self.on_grow is not None:
+                self.on_grow(len(data))
+        return data
+
+
+class ResponseCache:
+    """
+    LRU-кеш готовых тел ответов с ограничением по байтам.
+
+    Ключ — (вид снимка, маршрут, нормализованные параметры, версия снимка).
+    Если ответ зависит от нескольких снимков, первый элемент ключа — кортеж
+    их видов, например ("schedule", "replacements"). Размер записи — тело
+    плюс все сжатые варианты, поэтому в бюджет max_bytes попадает всё, что
+    реально лежит в памяти. При публикации нового снимка записи, зависящие
+    от его вида, удаляются (invalidate).
+    """
+
+    def __init__(self, max_bytes: int, name: str = "responses"):
+        self.max_bytes = max_bytes
+        self.name = name
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, PreparedBody] = OrderedDict()
+        self._sizes: dict[tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_build(self, key: tuple, build: Callable[[], PreparedBody]) -> PreparedBody:
+        """Готовое тело по ключу; build() вызывается только при промахе"""
+        prepared = self._entries.get(key)
+        if prepared is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            increment("cache.requests", labels={"cache": self.name, "result": "hit"})
+            return prepared
+
+        self.misses += 1
+        increment("cache.requests", labels={"cache": self.name, "result": "miss"})
+        prepared = build()
+        if prepared.size <= self.max_bytes:
+            self._entries[key] = prepared
+            self._sizes[key] = prepared.size
+            self.size += prepared.size
+            prepared.on_grow = lambda added: self._grow(key, prepared, added)
+            self._evict()
+        return prepared
+
+    def _grow(self, key: tuple, prepared: PreparedBody, added: int):
+        # Запись могли уже вытеснить: тогда её память не учитываем
+        if self._entries.get(key) is prepared:
+            self._sizes[key] += added
+            self.size += added
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._entries:
+            key, prepared = self._entries.popitem(last=False)
+            self.size -= self._sizes.pop(key)
+            prepared.on_grow = None
+            increment("cache.evictions", labels={"cache": self.name})
+
+    def invalidate(self, kind: Hashable):
+        """Удаляет все записи, зависящие от вида kind (первый элемент ключа)"""
+        def depends(key: tuple) -> bool:
+            return key[0] == kind or (isinstance(key[0], tuple) and kind in key[0])
+
+        for key in [key for key in self._entries if depends(key)]:
+            self._entries.pop(key).on_grow = None
+            self.size -= self._sizes.pop(key)
+
+    def to_dict(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / requests, 4) if requests else 0.0
+        }
+
+
+def _compress(body: bytes, encoding: str, level: str) -> bytes:
+    # Тела из снимка сжимаются один раз — можно сжимать сильнее
+    if encoding == "br":
+        return brotli.compress(body, quality=9 if level == "max" else 4)
+    return gzip.compress(body, compresslevel=9 if level == "max" else 6, mtime=0)
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def encode_json(payload: Any) -> bytes:
+    """
+    Сериализует payload в те же байты, что и JSONResponse FastAPI.
+
+    С orjson — в несколько раз быстрее: модели pydantic обходятся без
+    jsonable_encoder, списки и словари сериализуются на C.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_orjson_default)
+    return JSONResponse(content=jsonable_encoder(payload)).body
+
+
+def not_modified(etag: str, cache_control: str, headers: Optional[dict] = None) -> Response:
+    """Ответ 304 без тела (headers — дополнительные заголовки, например возраст данных)"""
+    return Response(status_code=304, headers={
+        **(headers or {}),
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding"
+    })
+
+
+def respond(request: Request, prepared: PreparedBody, cache_control: str,
+            headers: Optional[dict] = None) -> Response:
+    """Отдаёт готовое тело: 304 по If-None-Match или сжатый/несжатый JSON"""
+    encoding = None
+    if len(prepared.body) >= config.COMPRESS_MIN_SIZE:
+        encoding = choose_encoding(request)
+    etag = _variant_etag(prepared.etag, encoding)
+
+    if etag_matches(request, prepared.etag):
+        return not_modified(etag, cache_control, headers)
+
+    headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding"
+    }
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=prepared.encoded(encoding), media_type="application/json", headers=headers)
+
+
+def json_response(request: Request, payload: Any, cache_control: str,
+                  etag: Optional[str] = None, headers: Optional[dict] = None) -> Response:
+    """
+    JSON-ответ с ETag и Cache-Control, либо 304 Not Modified.
+
+    Если etag передан (например, из версии снимка), при совпадении с
+    If-None-Match payload даже не сериализуется. Иначе ETag считается по телу.
+    Тело сериализуется и сжимается на каждый запрос — для данных из снимка
+    используйте snapshot_response (main.py): готовые тела хранятся в
+    ResponseCache в пределах его бюджета памяти. Не храните PreparedBody
+    в самом снимке — такие тела не учитываются в max_bytes.
+    """
+    if etag is not None and etag_matches(request, etag):
+        return not_modified(etag, cache_control, headers)
+
+    return respond(request, PreparedBody(encode_json(payload), etag, level="fast"), cache_control, headers)
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест сервера с локальной заменой mpt.ru.
+
+Поднимает локальный «mpt.ru», который отдаёт страницы из fixtures/ (с ETag,
+задержкой и случайными ошибками), запускает сервер (uvicorn main:app) в
+отдельном процессе с MPT_BASE_URL/MPT_REPLACEMENTS_URL на него и нагружает
+/api/schedule и /api/replacements конкурентными клиентами. Группы выбираются
+по закону Ципфа: несколько групп запрашивают часто, остальные — редко.
+
+Выводит пропускную способность, p50/p95/p99 по эндпоинтам, число запросов к
+«mpt.ru» и посекундную ленту, в которой видно, как ведёт себя хвост задержек,
+когда кеш устаревает под нагрузкой:
+
+    python load_test.py --duration 30 --clients 50 --schedule-ttl 10 --upstream-latency 0.5
+    python load_test.py --failure-rate 0.3 --env MPT_PARSER_BACKEND=lxml
+    python load_test.py --change-every 5 --schedule-ttl 2      # каждое обновление с разбором страницы
+
+Клиенты работают в одном процессе Python: при сотнях клиентов упором может
+оказаться сам генератор нагрузки (смотрите на загрузку CPU обоих процессов).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+
+SERVER_DIR = Path(__file__).parent
+FIXTURES = SERVER_DIR / "fixtures"
+
+SCHEDULE_PATH = "/raspisanie/"
+REPLACEMENTS_PATH = "/izmeneniya-v-raspisanii/"
+
+
+# MARK: - Локальный mpt.ru
+
+@dataclass
+class UpstreamStats:
+    """Запросы к локальному mpt.ru по страницам: page -> {"ok", "not_modified", "failed"}"""
+    calls: dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    timeline: list[tuple[float, str, str]] = field(default_factory=list)   # (время, страница, результат)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, page: str, outcome: str):
+        with self.lock:
+            self.calls[page][outcome] += 1
+            self.timeline.append((time.monotonic(), page, outcome))
+
+    def snapshot(self) -> dict[str, Counter]:
+        with self.lock:
+            return {page: Counter(outcomes) for page, outcomes in self.calls.items()}
+
+
+class FakeUpstream:
+    """
+    HTTP-сервер со страницами mpt.ru в отдельном потоке.
+
+    Каждый ответ задерживается на latency ± jitter секунд. С вероятностью
+    failure_rate (или всегда во время outage) отвечает 503. Поддерживает
+    If-None-Match, как настоящий сайт, поэтому условная загрузка тоже работает.
+    С change_every страницы меняются раз в change_every секунд (в конец
+    дописывается номер ревизии), и обновления сервера действительно разбирают
+    страницу, а не получают 304 или тот же хеш.
+    """
+
+    def __init__(self, pages: dict[str, bytes], latency: float, jitter: float, failure_rate: float,
+                 change_every: float = 0):
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.change_every = change_every
+        self.outage = False
+        self.stats = UpstreamStats()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._started = time.monotonic()
+        self._revisions: dict[str, tuple[int, bytes, str]] = {}   # путь -> (ревизия, тело, ETag)
+        self._lock = threading.Lock()
+
+    def revision(self) -> int:
+        if self.change_every <= 0:
+            return 0
+        return int((time.monotonic() - self._started) / self.change_every)
+
+    def page(self, path: str) -> Optional[tuple[bytes, str]]:
+        """Тело и ETag страницы в текущей ревизии"""
+        original = self.pages.get(path)
+        if original is None:
+            return None
+        revision = self.revision()
+        with self._lock:
+            cached = self._revisions.get(path)
+            if cached is None or cached[0] != revision:
+                body = original if revision == 0 else original + f"\n<!-- ревизия {revision} -->\n".encode()
+                cached = self._revisions[path] = (revision, body, '"%s"' % hashlib.md5(body).hexdigest())
+        return cached[1], cached[2]
+
+    def start(self) -> str:
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                upstream.handle(self)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+    def handle(self, request: BaseHTTPRequestHandler):
+        page = self.page(request.path)
+        if page is None:
+            request.send_error(404)
+            return
+
+        name = "schedule" if request.path == SCHEDULE_PATH else "replacements"
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.outage or random.random() < self.failure_rate:
+            self.stats.record(name, "failed")
+            request.send_error(503)
+            return
+
+        body, etag = page
+        if request.headers.get("If-None-Match") == etag:
+            self.stats.record(name, "not_modified")
+            request.send_response(304)
+            request.send_header("ETag", etag)
+            request.end_headers()
+            return
+
+        self.stats.record(name, "ok")
+        request.send_response(200)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("ETag", etag)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+
+# MARK: - Сервер
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(port: int, upstream_url: str, args, data_dir: str) -> subprocess.Popen:
+    """uvicorn main:app в отдельном процессе, страницы — с локального mpt.ru"""
+    env = dict(os.environ)
+    env.update({
+        "MPT_BASE_URL": upstream_url + SCHEDULE_PATH,
+        "MPT_REPLACEMENTS_URL": upstream_url + REPLACEMENTS_PATH,
+        "MPT_SCHEDULE_SOFT_TTL": str(args.schedule_ttl),
+        "MPT_REPLACEMENTS_SOFT_TTL": str(args.replacements_ttl),
+        # Несколько воркеров делят снимки через SQLite; одному он не нужен
+        "MPT_SNAPSHOT_DB": os.path.join(data_dir, "snapshots.db") if args.workers > 1 else "",
+    })
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning", "--no-access-log"]
+    if args.workers > 1:
+        command += ["--workers", str(args.workers)]
+    return subprocess.Popen(command, cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float):
+    """Ждёт, пока сервер запустится и загрузит первый снимок"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Сервер завершился с кодом {process.returncode}")
+        try:
+            if (await client.get("/api/week-info")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Сервер не ответил за {timeout:.0f} с")
+
+
+async def load_groups(client: httpx.AsyncClient) -> list[tuple[str, str]]:
+    """Все (группа, specialty_id) из API сервера"""
+    groups = []
+    for spec in (await client.get("/api/specialties")).json():
+        response = await client.get("/api/groups", params={"specialty_id": spec["id"]})
+        groups += [(group["name"], spec["id"]) for group in response.json()]
+    return groups
+
+
+# MARK: - Нагрузка
+
+@dataclass
+class Sample:
+    started: float      # Секунд от начала нагрузки
+    endpoint: str
+    latency: float      # Секунд
+    status: int         # 0 — ошибка соединения
+
+
+class Workload:
+    """Случайные запросы клиента приложения: эндпоинт по mix, группа по Ципфу"""
+
+    def __init__(self, groups: list[tuple[str, str]], mix: dict[str, float], revalidate: float, seed: int):
+        self.rng = random.Random(seed)
+        self.groups = groups                # По убыванию популярности, одинаково для всех клиентов
+        self.group_weights = [1 / rank for rank in range(1, len(self.groups) + 1)]
+        self.endpoints = list(mix)
+        self.endpoint_weights = list(mix.values())
+        self.revalidate = revalidate
+        self.etags: dict[tuple, str] = {}
+
+    def next_request(self) -> tuple[str, str, dict, dict]:
+        endpoint = self.rng.choices(self.endpoints, self.endpoint_weights)[0]
+        group, specialty_id = self.rng.choices(self.groups, self.group_weights)[0]
+        if endpoint == "schedule":
+            path, params = "/api/schedule", {"group": group, "specialty_id": specialty_id}
+        else:
+            path, params = "/api/replacements", {"group": group}
+
+        # Часть клиентов уже держит ответ и перепроверяет его (как приложение при повторном открытии)
+        headers = {"Accept-Encoding": "gzip, br"}
+        etag = self.etags.get((path, group))
+        if etag and self.rng.random() < self.revalidate:
+            headers["If-None-Match"] = etag
+        return endpoint, path, params, headers
+
+    def remember(self, path: str, params: dict, response: httpx.Response):
+        etag = response.headers.get("ETag")
+        if etag:
+            self.etags[(path, params["group"])] = etag
+
+
+async def run_client(client: httpx.AsyncClient, workload: Workload, started: float, deadline: float,
+                     samples: list[Sample]):
+    while time.monotonic() < deadline:
+        endpoint, path, params, headers = workload.next_request()
+        request_started = time.monotonic()
+        try:
+            response = await client.get(path, params=params, headers=headers)
+            await response.aread()
+            status = response.status_code
+            workload.remember(path, params, response)
+        except httpx.HTTPError:
+            status = 0
+        samples.append(Sample(request_started - started, endpoint, time.monotonic() - request_started, status))
+
+
+async def run_outage(upstream: FakeUpstream, start: float, duration: float):
+    await asyncio.sleep(start)
+    upstream.outage = True
+    await asyncio.sleep(duration)
+    upstream.outage = False
+
+
+# MARK: - Отчёт
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(samples: list[Sample], duration: float) -> dict:
+    latencies = sorted(sample.latency for sample in samples)
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round((latencies[-1] if latencies else 0) * 1000, 2),
+        "statuses": dict(sorted(Counter(str(sample.status) for sample in samples).items()))
+    }
+
+
+def timeline(samples: list[Sample], upstream_events: list[tuple[float, str, str]], started: float,
+             duration: float) -> list[dict]:
+    """По секундам: запросы, p99, максимум и обращения к mpt.ru"""
+    seconds = max(int(duration), 1)
+    by_second: list[list[float]] = [[] for _ in range(seconds)]
+    for sample in samples:
+        by_second[min(int(sample.started), seconds - 1)].append(sample.latency)
+
+    upstream_by_second: list[Counter] = [Counter() for _ in range(seconds)]
+    for at, page, outcome in upstream_events:
+        second = int(at - started)
+        if 0 <= second < seconds:
+            upstream_by_second[second][f"{page}:{outcome}"] += 1
+
+    rows = []
+    for second, latencies in enumerate(by_second):
+        latencies.sort()
+        rows.append({
+            "second": second,
+            "requests": len(latencies),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round((latencies[-1] if latencies else 0) * 1000, 2),
+            "upstream": dict(upstream_by_second[second])
+        })
+    return rows
+
+
+def print_report(report: dict):
+    setup = report["setup"]
+    print(f"\nКлиентов: {setup['clients']}, длительность: {setup['duration']} с, воркеров: {setup['workers']}, "
+          f"mpt.ru: задержка {setup['upstream_latency']} с, ошибки {setup['failure_rate']:.0%}"
+          + (f", страницы меняются раз в {setup['change_every']} с" if setup.get("change_every") else ""))
+
+    print(f"\n{'эндпоинт':<14} {'запросов':>9} {'в сек':>8} {'p50, мс':>9} {'p95, мс':>9} "
+          f"{'p99, мс':>9} {'макс, мс':>9}  статусы")
+    for name, row in report["endpoints"].items():
+        print(f"{name:<14} {row['requests']:>9} {row['rps']:>8} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+              f"{row['p99_ms']:>9} {row['max_ms']:>9}  {row['statuses']}")
+
+    print("\nЗапросы к mpt.ru во время нагрузки:")
+    for page, outcomes in report["upstream"].items():
+        print(f"  {page}: {outcomes}")
+
+    if report.get("timeline"):
+        print(f"\n{'сек':>4} {'запросов':>9} {'p99, мс':>9} {'макс, мс':>9}  mpt.ru")
+        for row in report["timeline"]:
+            upstream = ", ".join(f"{key}={count}" for key, count in row["upstream"].items())
+            print(f"{row['second']:>4} {row['requests']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}  {upstream}")
+
+
+# MARK: - Запуск
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ("schedule", "replacements"):
+            raise argparse.ArgumentTypeError(f"неизвестный эндпоинт: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def run(args) -> dict:
+    pages = {
+        SCHEDULE_PATH: args.schedule_page.read_bytes(),
+        REPLACEMENTS_PATH: args.replacements_page.read_bytes()
+    }
+    upstream = FakeUpstream(pages, args.upstream_latency, args.upstream_jitter, args.failure_rate,
+                            args.change_every)
+    upstream_url = upstream.start()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as data_dir:
+        process = start_app(port, upstream_url, args, data_dir)
+        limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits,
+                                         timeout=args.timeout) as client:
+                await wait_ready(client, process, args.startup_timeout)
+                groups = await load_groups(client)
+                if not groups:
+                    raise RuntimeError("В расписании нет групп")
+                random.Random(args.seed).shuffle(groups)
+                print(f"Сервер готов, групп: {len(groups)}. Нагрузка {args.duration} с...")
+
+                upstream_before = upstream.stats.snapshot()
+                samples: list[Sample] = []
+                started = time.monotonic()
+                deadline = started + args.duration
+                tasks = [
+                    asyncio.create_task(run_client(
+                        client, Workload(groups, args.mix, args.revalidate, args.seed + number),
+                        started, deadline, samples
+                    ))
+                    for number in range(args.clients)
+                ]
+                if args.outage:
+                    outage_start, _, outage_duration = args.outage.partition(":")
+                    tasks.append(asyncio.create_task(run_outage(upstream, float(outage_start), float(outage_duration))))
+                await asyncio.gather(*tasks)
+                duration = time.monotonic() - started
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            upstream.stop()
+
+    upstream_after = upstream.stats.snapshot()
+    endpoints = {"all": summarize(samples, duration)}
+    for name in args.mix:
+        endpoints[name] = summarize([sample for sample in samples if sample.endpoint == name], duration)
+
+    return {
+        "setup": {
+            "clients": args.clients,
+            "duration": args.duration,
+            "workers": args.workers,
+            "mix": args.mix,
+            "upstream_latency": args.upstream_latency,
+            "failure_rate": args.failure_rate,
+            "change_every": args.change_every,
+            "outage": args.outage,
+            "env": args.env
+        },
+        "endpoints": endpoints,
+        "upstream": {
+            page: dict(upstream_after[page] - upstream_before.get(page, Counter()))
+            for page in sorted(upstream_after)
+        },
+        "timeline": timeline(samples, upstream.stats.timeline, started, duration) if not args.no_timeline else []
+    }
+
+
+def main() -> int:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("--clients", type=int, default=50, help="конкурентных клиентов")
+    arguments.add_argument("--duration", type=float, default=30, help="длительность нагрузки, сек")
+    arguments.add_argument("--mix", type=parse_mix, default=parse_mix("schedule=3,replacements=2"),
+                           help="доли эндпоинтов, например schedule=3,replacements=2")
+    arguments.add_argument("--revalidate", type=float, default=0.3,
+                           help="доля запросов с If-None-Match, если у клиента уже есть ответ")
+    arguments.add_argument("--workers", type=int, default=1, help="uvicorn-воркеров сервера")
+    arguments.add_argument("--schedule-ttl", type=float, default=10,
+                           help="MPT_SCHEDULE_SOFT_TTL: через сколько секунд кеш расписания устаревает")
+    arguments.add_argument("--replacements-ttl", type=float, default=5, help="MPT_REPLACEMENTS_SOFT_TTL")
+    arguments.add_argument("--upstream-latency", type=float, default=0.2, help="задержка ответа mpt.ru, сек")
+    arguments.add_argument("--upstream-jitter", type=float, default=0.05, help="разброс задержки mpt.ru, сек")
+    arguments.add_argument("--failure-rate", type=float, default=0.0, help="доля ответов 503 от mpt.ru")
+    arguments.add_argument("--change-every", type=float, default=0,
+                           help="менять страницы mpt.ru раз в N секунд, чтобы обновления разбирали их заново "
+                                "(0 — страницы не меняются)")
+    arguments.add_argument("--outage", help="mpt.ru недоступен: НАЧАЛО:ДЛИТЕЛЬНОСТЬ в секундах от начала нагрузки")
+    arguments.add_argument("--schedule-page", type=Path, default=FIXTURES / "schedule_large.html")
+    arguments.add_argument("--replacements-page", type=Path, default=FIXTURES / "replacements_large.html")
+    arguments.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                           help="дополнительные настройки сервера, например MPT_PARSER_BACKEND=lxml")
+    arguments.add_argument("--timeout", type=float, default=30, help="таймаут запроса клиента, сек")
+    arguments.add_argument("--startup-timeout", type=float, default=60, help="сколько ждать запуска сервера, сек")
+    arguments.add_argument("--seed", type=int, default=1)
+    arguments.add_argument("--no-timeline", action="store_true", help="не выводить посекундную ленту")
+    arguments.add_argument("--json", type=Path, help="сохранить отчёт в JSON")
+    args = arguments.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
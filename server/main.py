@@ -1,24 +1,100 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from typing import Optional
+from datetime import timedelta
+import asyncio
 import time
-from bs4 import BeautifulSoup
 
 from models import (
-    WeekInfo, Specialty, Group, WeekSchedule, ScheduleResponse,
-    ReplacementsResponse
+    WeekInfo, Specialty, Group, WeekSchedule, ScheduleResponse, SchedulesRequest,
+    ReplacementsResponse, TeacherDay, TeacherSchedule, EffectiveSchedule
 )
-from parser import (
-    fetch_page, parse_week_info, parse_specialties,
-    parse_groups_for_specialty, parse_schedule_for_group,
-    get_all_groups_from_soup, fetch_replacements, get_replacements_for_group
+from parser import BASE_URL, REPLACEMENTS_URL, DAYS_NAMES
+from snapshot import (
+    ScheduleSnapshot, ReplacementsSnapshot,
+    parse_schedule_page, build_replacements_snapshot, next_version
 )
+from changes import ChangeLog
+from effective import EffectiveIndex, moscow_date, parse_date
+from subscriptions import ReplacementsHub
+from content import ContentStore
+from upstream import ConditionalFetcher
+from store import SnapshotStore, LeaderLock
+from http_cache import (
+    make_etag, etag_matches, not_modified, json_response,
+    PreparedBody, ResponseCache, encode_json, respond
+)
+import upstream
+from refresher import Checked, RefreshingCache, refresh_periodically
+from metrics import LoopLagMonitor, RequestTimingMiddleware, timed, timings, counters, render_prometheus
+from workers import run_in_pool
+import workers
+import config
+
+
+# Следит за блокировками event loop (см. /api/stats)
+loop_monitor = LoopLagMonitor(interval=config.LOOP_LAG_INTERVAL)
+
+# Снимки на диске (открывается в lifespan, None — хранение отключено).
+# Хранилище общее для всех uvicorn-воркеров: страницы mpt.ru загружает и
+# разбирает только лидер, остальные читают опубликованные им снимки.
+snapshot_store: Optional[SnapshotStore] = None
+leader_lock: Optional[LeaderLock] = None
+
+# Версии снимков из хранилища, которые сейчас лежат в кешах этого процесса
+published_versions: dict[str, int] = {}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global snapshot_store, leader_lock
+    # Один HTTP-клиент к mpt.ru на всё время работы (keep-alive, HTTP/2)
+    upstream.get_client()
+    follower_task = None
+    if config.SNAPSHOT_DB_PATH:
+        snapshot_store = SnapshotStore(config.SNAPSHOT_DB_PATH)
+        leader_lock = LeaderLock(config.SNAPSHOT_DB_PATH + ".leader")
+        leader_lock.try_acquire()
+        print("Воркер — лидер: загружает mpt.ru" if is_leader() else "Воркер читает снимки лидера")
+        restore_snapshots()
+        follower_task = asyncio.create_task(follow_leader())
+    
+    # Страницы обновляются по расписанию, запросы mpt.ru не ждут
+    for _, cache, _ in snapshot_kinds():
+        if cache.value is None:
+            cache.refresh_in_background()
+    refresh_tasks = [
+        asyncio.create_task(refresh_periodically(
+            schedule_cache, config.SCHEDULE_REFRESH_INTERVAL, config.REFRESH_JITTER
+        )),
+        asyncio.create_task(refresh_periodically(
+            replacements_cache, config.REPLACEMENTS_REFRESH_INTERVAL, config.REFRESH_JITTER
+        ))
+    ]
+    # Контент читается с диска сразу и перечитывается при изменении файлов
+    content_store.reload_if_changed()
+    if config.CONTENT_RELOAD_INTERVAL > 0:
+        refresh_tasks.append(asyncio.create_task(content_store.watch(config.CONTENT_RELOAD_INTERVAL)))
+    loop_monitor.start()
+    yield
+    for task in refresh_tasks:
+        task.cancel()
+    if follower_task is not None:
+        follower_task.cancel()
+    if leader_lock is not None:
+        leader_lock.release()
+    await loop_monitor.stop()
+    await upstream.close_client()
+    workers.shutdown()
 
 
 app = FastAPI(
     title="MPT Schedule API",
     description="API для получения расписания Московского приборостроительного техникума",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS для iOS приложения
@@ -30,33 +106,276 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Кеш для данных (простой in-memory кеш)
-cache = {
-    "html": None,
-    "soup": None,
-    "week_info": None,
-    "specialties": None,
-    "last_update": None
-}
+# Время ответа по маршрутам для /metrics
+app.add_middleware(RequestTimingMiddleware)
+
 
+def is_leader() -> bool:
+    """Загружает ли этот процесс страницы mpt.ru (без общего хранилища — всегда да)"""
+    return leader_lock is None or leader_lock.is_leader
+
+
+def snapshot_kinds():
+    return (
+        ("schedule", schedule_cache, ScheduleSnapshot),
+        ("replacements", replacements_cache, ReplacementsSnapshot)
+    )
+
+
+def restore_snapshots():
+    """Поднимает последние снимки с диска и запускает их фоновое обновление"""
+    for kind, cache, model in snapshot_kinds():
+        try:
+            started = time.perf_counter()
+            stored = snapshot_store.load(kind, model)
+        except Exception as e:
+            print(f"Не удалось загрузить снимок {kind} с диска: {e}")
+            continue
+        if stored is None:
+            continue
+        
+        # Возраст — от последней проверки лидером, а не от момента рестарта
+        cache.seed(stored.snapshot, stored.checked_at, stored.last_error)
+        published_versions[kind] = stored.version
+        cache.refresh_in_background()
+        print(f"Снимок {kind} загружен с диска за {time.perf_counter() - started:.3f} с")
+
+
+async def persist_snapshot(kind: str, snapshot):
+    """Публикует новый снимок в хранилище (в потоке, чтобы не блокировать event loop)"""
+    if snapshot_store is None:
+        return
+    try:
+        published_versions[kind] = await asyncio.to_thread(snapshot_store.save, kind, snapshot)
+    except Exception as e:
+        print(f"Не удалось сохранить снимок {kind} на диск: {e}")
 
-async def get_soup() -> BeautifulSoup:
-    """Получает и кеширует BeautifulSoup объект"""
-    current_time = time.time()
+
+async def publish_check(kind: str, checked_at: Optional[float], error: Optional[str] = None):
+    """
+    Записывает в хранилище результат проверки mpt.ru, не давшей нового снимка:
+    время удачной проверки или ошибку (checked_at=None). По ним последователи
+    считают Age и X-Data-Stale так же, как лидер.
+    """
+    if snapshot_store is None:
+        return
+    try:
+        await asyncio.to_thread(snapshot_store.mark_checked, kind, checked_at, error)
+    except Exception as e:
+        print(f"Не удалось записать проверку {kind}: {e}")
+
+
+async def load_published(kind: str, cache: RefreshingCache, model):
+    """
+    Загрузчик для воркера-последователя: берёт снимок, опубликованный лидером.
     
-    # Обновляем кеш каждые 5 минут
-    if cache["soup"] is None or cache["last_update"] is None or \
-       (current_time - cache["last_update"]) > 300:
-        print("Загрузка страницы с сайта...")
-        html = await fetch_page()
-        cache["html"] = html
-        cache["soup"] = BeautifulSoup(html, "lxml")
-        cache["last_update"] = current_time
-        cache["week_info"] = None
-        cache["specialties"] = None
-        print("Страница загружена и закеширована")
+    Если в кеше уже последняя версия, возвращает её без чтения данных.
+    Если снимка ещё нет совсем, ждёт, пока лидер его опубликует.
+    Время проверки и ошибка берутся у лидера, а не от текущего момента.
+    """
+    deadline = time.monotonic() + config.SHARED_WAIT_TIMEOUT
+    while True:
+        status = await asyncio.to_thread(snapshot_store.status, kind)
+        if status is not None and (cache.value is None or status.version != published_versions.get(kind)):
+            stored = await asyncio.to_thread(snapshot_store.load, kind, model)
+            published_versions[kind] = stored.version
+            return Checked(stored.snapshot, stored.checked_at, stored.last_error)
+        if cache.value is not None:
+            if status is None:
+                return Checked(cache.value, cache.updated_at, cache.last_error)
+            return Checked(cache.value, status.checked_at, status.last_error)
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Лидер ещё не опубликовал снимок {kind}")
+        await asyncio.sleep(0.2)
+
+
+async def follow_leader():
+    """
+    Фоновая задача каждого воркера с общим хранилищем.
     
-    return cache["soup"]
+    Последователь подхватывает новые версии снимков почти сразу после
+    публикации и пытается стать лидером, если прежний лидер завершился.
+    """
+    while True:
+        await asyncio.sleep(config.SHARED_POLL_INTERVAL)
+        try:
+            if not is_leader():
+                if leader_lock.try_acquire():
+                    print("Воркер стал лидером: загружает mpt.ru")
+                    for _, cache, _ in snapshot_kinds():
+                        cache.refresh_in_background()
+                    continue
+                
+                for kind, cache, model in snapshot_kinds():
+                    status = await asyncio.to_thread(snapshot_store.status, kind)
+                    if status is None:
+                        continue
+                    if status.version != published_versions.get(kind):
+                        stored = await asyncio.to_thread(snapshot_store.load, kind, model)
+                        cache.seed(stored.snapshot, stored.checked_at, stored.last_error)
+                        published_versions[kind] = stored.version
+                    elif cache.value is not None:
+                        # Та же версия: лидер мог проверить страницу ещё раз или получить ошибку
+                        cache.seed(cache.value, status.checked_at, status.last_error)
+        except Exception as e:
+            print(f"Ошибка синхронизации с лидером: {e}")
+
+
+# Условная загрузка страниц: неизменённый HTML повторно не разбирается
+schedule_fetcher = ConditionalFetcher(BASE_URL, name="schedule")
+replacements_fetcher = ConditionalFetcher(REPLACEMENTS_URL, name="replacements")
+
+
+async def load_schedule_snapshot() -> ScheduleSnapshot:
+    """Загружает страницу расписания и строит по ней индекс"""
+    if not is_leader():
+        return await load_published("schedule", schedule_cache, ScheduleSnapshot)
+    
+    print("Загрузка страницы с сайта...")
+    previous = schedule_cache.value
+    fetched_at = time.time()
+    try:
+        page = await schedule_fetcher.fetch(previous.content_hash if previous else None)
+    except Exception as e:
+        await publish_check("schedule", None, str(e) or type(e).__name__)
+        raise
+    
+    if previous is not None and page.content_hash == previous.content_hash:
+        print("Страница не изменилась, используем прежний индекс")
+        await publish_check("schedule", fetched_at)
+        return previous
+    
+    # Разбор страницы и построение индекса — в пуле, event loop не блокируется
+    with timed("parse.page", {"page": "schedule"}):
+        snapshot = await run_in_pool(
+            parse_schedule_page, page.text, fetched_at,
+            content_hash=page.content_hash, version=next_version(previous)
+        )
+    print("Страница загружена, индекс расписания построен")
+    await persist_snapshot("schedule", snapshot)
+    return snapshot
+
+
+async def load_replacements() -> ReplacementsSnapshot:
+    """Загружает и парсит страницу замен"""
+    if not is_leader():
+        return await load_published("replacements", replacements_cache, ReplacementsSnapshot)
+    
+    print("Загрузка страницы замен...")
+    previous = replacements_cache.value
+    fetched_at = time.time()
+    try:
+        page = await replacements_fetcher.fetch(previous.content_hash if previous else None)
+    except Exception as e:
+        await publish_check("replacements", None, str(e) or type(e).__name__)
+        raise
+    
+    if previous is not None and page.content_hash == previous.content_hash:
+        print("Страница замен не изменилась")
+        await publish_check("replacements", fetched_at)
+        return previous
+    
+    with timed("parse.page", {"page": "replacements"}):
+        snapshot = await run_in_pool(
+            build_replacements_snapshot, page.text, fetched_at,
+            content_hash=page.content_hash, version=next_version(previous)
+        )
+    print(f"Загружено {sum(len(d.groups) for d in snapshot.replacements.days)} групп с заменами")
+    await persist_snapshot("replacements", snapshot)
+    return snapshot
+
+
+# Готовые тела ответов по (вид снимка, маршрут, параметры, версия снимка);
+# записи вида удаляются, как только его кеш получает новый снимок
+response_cache = ResponseCache(max_bytes=config.RESPONSE_CACHE_MAX_BYTES)
+
+def on_snapshot_change(kind: str):
+    """
+    Обработчик нового снимка вида kind: сбрасывает готовые ответы, записывает
+    версию в журнал /api/changes и строит индекс расписания с заменами.
+    Срабатывает на каждой публикации — и у лидера, и у последователей, —
+    поэтому эта работа выполняется в задаче обновления, а не в запросе.
+    """
+    def handle(snapshot):
+        response_cache.invalidate(kind)
+        schedule, replacements = schedule_cache.value, replacements_cache.value
+        if schedule is None or replacements is None:
+            return
+        change_log.current(schedule, replacements)
+        try:
+            build_effective_index(schedule, replacements)
+        except Exception as e:
+            # Не мешаем публикации: индекс построится при первом запросе
+            print(f"Не удалось построить индекс расписания с заменами: {e}")
+    return handle
+
+
+# Кеши со stale-while-revalidate: при истечении TTL страница загружается
+# одной фоновой задачей, а запросы тем временем получают предыдущий снимок.
+# Если mpt.ru недоступен, отдаётся последний удачный снимок (X-Data-Stale: true).
+schedule_cache = RefreshingCache(
+    "schedule", load_schedule_snapshot,
+    soft_ttl=config.SCHEDULE_SOFT_TTL, hard_ttl=config.SCHEDULE_HARD_TTL, serve_stale=True,
+    on_change=on_snapshot_change("schedule")
+)
+replacements_cache = RefreshingCache(
+    "replacements", load_replacements,
+    soft_ttl=config.REPLACEMENTS_SOFT_TTL, hard_ttl=config.REPLACEMENTS_HARD_TTL, serve_stale=True,
+    on_change=on_snapshot_change("replacements")
+)
+
+
+async def get_snapshot() -> ScheduleSnapshot:
+    """Получает индекс расписания из кеша"""
+    return await schedule_cache.get()
+
+
+# Клиенту разрешено кешировать ответы столько же, сколько живёт снимок на сервере;
+# после этого он перепроверяет их по ETag и обычно получает 304
+SCHEDULE_CACHE_CONTROL = f"public, max-age={int(config.SCHEDULE_SOFT_TTL)}"
+REPLACEMENTS_CACHE_CONTROL = f"public, max-age={int(config.REPLACEMENTS_SOFT_TTL)}"
+CONTENT_CACHE_CONTROL = f"public, max-age={int(config.CONTENT_MAX_AGE)}"
+
+
+def snapshot_tag(snapshot) -> str:
+    """Версия снимка для ETag: хеш исходного HTML"""
+    return snapshot.content_hash or repr(snapshot.fetched_at)
+
+
+def freshness_headers(*caches: RefreshingCache) -> dict:
+    """
+    Возраст данных (Age, секунды с последней удачной проверки mpt.ru) и
+    X-Data-Stale: true, если страницу не удалось вовремя обновить.
+    """
+    ages = [cache.age for cache in caches if cache.age is not None]
+    return {
+        "Age": str(int(max(ages))) if ages else "0",
+        "X-Data-Stale": "true" if any(cache.is_stale for cache in caches) else "false"
+    }
+
+
+def cache_for(snapshot) -> RefreshingCache:
+    return replacements_cache if isinstance(snapshot, ReplacementsSnapshot) else schedule_cache
+
+
+def snapshot_response(request: Request, snapshot, cache_control: str, key: tuple, build) -> Response:
+    """
+    Ответ из снимка: build() вызывается, а тело сериализуется и сжимается
+    один раз на снимок и ключ; остальные запросы получают готовые байты
+    из response_cache.
+    
+    key — маршрут и нормализованные параметры, например ("groups", specialty_id).
+    """
+    cache = cache_for(snapshot)
+    headers = freshness_headers(cache)
+    tag = snapshot_tag(snapshot)
+    etag = make_etag(*key, tag)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control, headers)
+    prepared = response_cache.get_or_build(
+        (cache.name, *key, tag), lambda: PreparedBody(encode_json(build()), etag)
+    )
+    return respond(request, prepared, cache_control, headers)
 
 
 @app.get("/")
@@ -70,10 +389,21 @@ async def root():
             "specialties": "/api/specialties",
             "groups": "/api/groups?specialty_id=<tab_id>",
             "schedule": "/api/schedule?group=<group_name>&specialty_id=<tab_id>",
+            "schedules": "POST /api/schedules",
+            "export": "/api/export?specialty_id=<tab_id>",
+            "changes": "/api/changes?since=<version>",
+            "replacements_stream": "/api/replacements/stream?group=<group_name>",
+            "bootstrap": "/api/bootstrap?group=<group_name>&specialty_id=<tab_id>",
+            "effective_schedule": "/api/effective-schedule?group=<group_name>&specialty_id=<tab_id>&dates=<dd.mm.yyyy,...>",
             "all_groups": "/api/all-groups",
+            "teachers": "/api/teachers",
+            "teacher_schedule": "/api/teacher-schedule?name=<teacher>",
             "content": {
                 "advertisements": "/api/content/advertisements",
                 "news": "/api/content/news",
+                "resource_collections": "/api/content/resource-collections",
+                "version": "/api/content/version",
+                "bundle": "/api/content/bundle",
                 "app_info": "/api/content/app-info"
             },
             "admin": "/admin"
@@ -82,104 +412,89 @@ async def root():
 
 
 @app.get("/api/week-info", response_model=WeekInfo)
-async def get_week_info():
+async def get_week_info(request: Request):
     """Получить информацию о текущей неделе (дата и тип: Числитель/Знаменатель)"""
     try:
-        soup = await get_soup()
-        
-        if cache["week_info"] is None:
-            cache["week_info"] = parse_week_info(soup)
-        
-        return cache["week_info"]
+        snapshot = await get_snapshot()
+        return snapshot_response(
+            request, snapshot, SCHEDULE_CACHE_CONTROL, ("week-info",), lambda: snapshot.week_info
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
 
 
 @app.get("/api/specialties", response_model=list[Specialty])
-async def get_specialties():
+async def get_specialties(request: Request):
     """Получить список специальностей"""
     try:
-        soup = await get_soup()
-        
-        if cache["specialties"] is None:
-            cache["specialties"] = parse_specialties(soup)
-        
-        return cache["specialties"]
+        snapshot = await get_snapshot()
+        return snapshot_response(
+            request, snapshot, SCHEDULE_CACHE_CONTROL, ("specialties",), lambda: snapshot.specialties
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
 
 
 @app.get("/api/groups", response_model=list[Group])
-async def get_groups(specialty_id: str = Query(..., description="ID специальности (tab_id из /api/specialties)")):
+async def get_groups(
+    request: Request,
+    specialty_id: str = Query(..., description="ID специальности (tab_id из /api/specialties)")
+):
     """Получить группы для специальности"""
     try:
-        soup = await get_soup()
-        groups = parse_groups_for_specialty(soup, specialty_id)
+        snapshot = await get_snapshot()
+        groups = snapshot.get_groups(specialty_id)
         
         if not groups:
             raise HTTPException(status_code=404, detail=f"Группы для специальности '{specialty_id}' не найдены")
         
-        return groups
+        return snapshot_response(
+            request, snapshot, SCHEDULE_CACHE_CONTROL, ("groups", specialty_id), lambda: groups
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
 
 
+def week_info_payload(week_info: WeekInfo) -> dict:
+    return week_info.model_dump(mode="json")
+
+
+def group_schedule_payload(schedule: WeekSchedule) -> dict:
+    # Поля модели совпадают с форматом ответа — дамп pydantic быстрее ручной сборки словаря
+    return schedule.model_dump(mode="json")
+
+
+def schedule_payload(week_info: WeekInfo, schedule: WeekSchedule) -> dict:
+    """Тело ответа /api/schedule"""
+    return {
+        "week_info": week_info_payload(week_info),
+        "schedule": group_schedule_payload(schedule)
+    }
+
+
 @app.get("/api/schedule")
 async def get_schedule(
+    request: Request,
     group: str = Query(..., description="Название группы, например 'Э-1-22, Э-11/1-23'"),
     specialty_id: str = Query(..., description="ID специальности (tab_id)")
 ):
     """Получить расписание для группы на неделю"""
     try:
-        soup = await get_soup()
+        snapshot = await get_snapshot()
         
-        week_info = parse_week_info(soup)
-        print(f"Парсинг расписания для группы: {group}, specialty_id: {specialty_id}")
-        schedule = parse_schedule_for_group(soup, group, specialty_id)
+        week_info = snapshot.week_info
+        schedule = snapshot.get_schedule(group, specialty_id)
         
         if not schedule:
             print(f"Расписание не найдено для группы: {group}")
             raise HTTPException(status_code=404, detail=f"Расписание для группы '{group}' не найдено")
         
-        # Подсчитываем количество пар
-        total_lessons = sum(len(day.lessons) for day in schedule.days)
-        print(f"Найдено {total_lessons} пар в расписании")
-        
-        # Преобразуем в dict для отладки
-        result = {
-            "week_info": {
-                "date": week_info.date,
-                "week_type": week_info.week_type.value,
-                "week_type_ru": week_info.week_type_ru
-            },
-            "schedule": {
-                "group": schedule.group,
-                "specialty_id": schedule.specialty_id,
-                "days": [
-                    {
-                        "day": day.day,
-                        "day_index": day.day_index,
-                        "campus": day.campus,
-                        "lessons": [
-                            {
-                                "number": lesson.number,
-                                "subject": lesson.subject,
-                                "teacher": lesson.teacher,
-                                "subject_denominator": lesson.subject_denominator,
-                                "teacher_denominator": lesson.teacher_denominator
-                            }
-                            for lesson in day.lessons
-                        ],
-                        "is_day_off": day.is_day_off
-                    }
-                    for day in schedule.days
-                ]
-            }
-        }
-        
-        return result
+        return snapshot_response(
+            request, snapshot, SCHEDULE_CACHE_CONTROL, ("schedule", group, specialty_id),
+            lambda: schedule_payload(week_info, schedule)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -188,23 +503,165 @@ async def get_schedule(
         raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
 
 
+def group_schedule_json(snapshot: ScheduleSnapshot, schedule: WeekSchedule) -> bytes:
+    """JSON расписания одной группы, сериализуется один раз на снимок (в response_cache)"""
+    key = ("group-schedule", schedule.specialty_id, schedule.group, snapshot_tag(snapshot))
+    return response_cache.get_or_build(
+        ("schedule", *key),
+        lambda: PreparedBody(encode_json(group_schedule_payload(schedule)), make_etag(*key))
+    ).body
+
+
+async def stream_schedules(snapshot: ScheduleSnapshot, schedules: list[WeekSchedule], not_found: list[dict]):
+    """
+    Тело ответа /api/schedules по частям:
+    {"week_info": ..., "schedules": [...], "not_found": [...]}
+    """
+    yield b'{"week_info":' + encode_json(week_info_payload(snapshot.week_info)) + b',"schedules":['
+    for i, schedule in enumerate(schedules):
+        yield (b"," if i else b"") + group_schedule_json(snapshot, schedule)
+    yield b'],"not_found":' + encode_json(not_found) + b"}"
+
+
+@app.post("/api/schedules")
+async def get_schedules(body: SchedulesRequest):
+    """
+    Расписания нескольких групп за один запрос.
+    
+    Принимает список пар (group, specialty_id) и/или specialty_id — тогда
+    в ответ входят все группы специальности. week_info в ответе один.
+    Группы, которых нет в расписании, перечисляются в not_found.
+    """
+    if not body.groups and not body.specialty_id:
+        raise HTTPException(status_code=400, detail="Укажите groups или specialty_id")
+    
+    try:
+        snapshot = await get_snapshot()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
+    
+    schedules = []
+    not_found = []
+    seen = set()
+    
+    if body.specialty_id:
+        if body.specialty_id not in snapshot.schedules:
+            raise HTTPException(status_code=404, detail=f"Группы для специальности '{body.specialty_id}' не найдены")
+        for group in snapshot.get_groups(body.specialty_id):
+            schedule = snapshot.get_schedule(group.name, body.specialty_id)
+            if schedule is not None:
+                seen.add((body.specialty_id, group.name))
+                schedules.append(schedule)
+    
+    for ref in body.groups:
+        if (ref.specialty_id, ref.group) in seen:
+            continue
+        seen.add((ref.specialty_id, ref.group))
+        schedule = snapshot.get_schedule(ref.group, ref.specialty_id)
+        if schedule is None:
+            not_found.append({"group": ref.group, "specialty_id": ref.specialty_id})
+        else:
+            schedules.append(schedule)
+    
+    return StreamingResponse(
+        stream_schedules(snapshot, schedules, not_found),
+        media_type="application/json",
+        headers={**freshness_headers(schedule_cache), "Cache-Control": "no-store"}
+    )
+
+
+# MARK: - Выгрузка
+
+async def stream_export(snapshot: ScheduleSnapshot, replacements: ReplacementsSnapshot,
+                        specialty_id: Optional[str]):
+    """
+    NDJSON всей выгрузки: строка week_info, затем по строке на расписание
+    группы и на замены группы за день. Строки строятся по одной прямо из
+    снимков, поэтому память не зависит от объёма выгрузки.
+    """
+    yield encode_json({
+        "type": "week_info",
+        **week_info_payload(snapshot.week_info),
+        "fetched_at": snapshot.fetched_at
+    }) + b"\n"
+    
+    specialty_ids = [specialty_id] if specialty_id else [spec.id for spec in snapshot.specialties]
+    group_names = set()
+    for spec_id in specialty_ids:
+        for schedule in snapshot.schedules.get(spec_id, {}).values():
+            group_names.add(schedule.group)
+            yield encode_json({"type": "schedule", **group_schedule_payload(schedule)}) + b"\n"
+    
+    # Таблицы замен специальности — по группам из составных названий
+    # ("Э-1-22, Э-11/1-23"), как в /api/replacements
+    tables = None
+    if specialty_id:
+        tables = set()
+        for group_name in group_names:
+            tables.update(replacements.group_tables(group_name))
+    
+    for day_pos, day in enumerate(replacements.replacements.days):
+        for group_pos, group in enumerate(day.groups):
+            if tables is not None and (day_pos, group_pos) not in tables:
+                continue
+            yield encode_json({
+                "type": "replacements",
+                "date": day.date,
+                "date_display": day.date_display,
+                "is_today": day.is_today,
+                "group_name": group.group_name,
+                "replacements": group.replacements
+            }) + b"\n"
+
+
+@app.get("/api/export")
+async def export_all(
+    specialty_id: Optional[str] = Query(None, description="Выгрузить только эту специальность (опционально)")
+):
+    """
+    Полная выгрузка расписаний всех групп и текущих замен в формате NDJSON.
+    
+    Дешёвый путь для массовых потребителей вместо /api/all-groups и
+    множества запросов /api/schedule.
+    """
+    try:
+        snapshot = await get_snapshot()
+        replacements = await replacements_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
+    
+    if specialty_id and specialty_id not in snapshot.schedules:
+        raise HTTPException(status_code=404, detail=f"Группы для специальности '{specialty_id}' не найдены")
+    
+    return StreamingResponse(
+        stream_export(snapshot, replacements, specialty_id),
+        media_type="application/x-ndjson",
+        # В выгрузке есть замены: max-age — как у замен (их TTL короче)
+        headers={**freshness_headers(schedule_cache, replacements_cache), "Cache-Control": REPLACEMENTS_CACHE_CONTROL}
+    )
+
+
+def all_groups_payload(snapshot: ScheduleSnapshot) -> dict:
+    """Тело ответа /api/all-groups"""
+    result = {}
+    for spec in snapshot.specialties:
+        groups = snapshot.get_groups(spec.id)
+        result[spec.name] = {
+            "specialty_id": spec.id,
+            "code": spec.code,
+            "groups": [{"id": g.id, "name": g.name} for g in groups]
+        }
+    return result
+
+
 @app.get("/api/all-groups")
-async def get_all_groups():
+async def get_all_groups(request: Request):
     """Получить все группы для всех специальностей"""
     try:
-        soup = await get_soup()
-        specialties = parse_specialties(soup)
-        
-        result = {}
-        for spec in specialties:
-            groups = parse_groups_for_specialty(soup, spec.id)
-            result[spec.name] = {
-                "specialty_id": spec.id,
-                "code": spec.code,
-                "groups": [{"id": g.id, "name": g.name} for g in groups]
-            }
-        
-        return result
+        snapshot = await get_snapshot()
+        return snapshot_response(
+            request, snapshot, SCHEDULE_CACHE_CONTROL, ("all-groups",), lambda: all_groups_payload(snapshot)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
 
@@ -212,116 +669,363 @@ async def get_all_groups():
 @app.get("/api/refresh")
 async def refresh_cache():
     """Принудительно обновить кеш"""
-    cache["soup"] = None
-    cache["html"] = None
-    cache["week_info"] = None
-    cache["specialties"] = None
-    cache["last_update"] = None
-    cache["replacements"] = None
-    cache["replacements_update"] = None
-    
-    await get_soup()
+    replacements_cache.invalidate()
+    await schedule_cache.refresh()
     
     return {"message": "Кеш обновлён", "timestamp": time.time()}
 
 
+@app.get("/api/stats")
+async def get_stats():
+    """
+    Служебная статистика: блокировки event loop и время парсинга.
+    
+    blocked_seconds_total в режиме MPT_PARSE_EXECUTOR=inline показывает,
+    сколько event loop простаивал из-за парсинга до переноса его в пул.
+    """
+    return {
+        "leader": is_leader(),
+        "published_versions": published_versions,
+        "parse_executor": config.PARSE_EXECUTOR,
+        "event_loop": loop_monitor.to_dict(),
+        "timings": {name: timing.to_dict() for name, timing in timings.items()},
+        "counters": counters,
+        "sse_subscribers": replacements_hub.subscriber_count,
+        "caches": {cache.name: cache.to_dict() for _, cache, _ in snapshot_kinds()},
+        "response_cache": response_cache.to_dict(),
+        "content": content_store.to_dict(),
+        "circuit_breakers": {
+            fetcher.name: fetcher.breaker.to_dict() for fetcher in (schedule_fetcher, replacements_fetcher)
+        }
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Метрики в формате Prometheus: загрузка mpt.ru (время, байты, ошибки),
+    время парсинга по функциям, попадания в кеши, возраст снимков и время
+    ответа по маршрутам.
+    """
+    gauges = []
+    for kind, cache, _ in snapshot_kinds():
+        labels = {"kind": kind}
+        if cache.age is not None:
+            gauges.append(("snapshot.age_seconds", "Секунд с последнего удачного обновления снимка", labels, cache.age))
+        gauges.append(("snapshot.stale", "1 — отдаётся устаревший снимок", labels, int(cache.is_stale)))
+        if cache.value is not None:
+            gauges.append(("snapshot.version", "Версия текущего снимка", labels, cache.value.version))
+    for fetcher in (schedule_fetcher, replacements_fetcher):
+        gauges.append((
+            "upstream.circuit_open", "1 — предохранитель страницы разомкнут",
+            {"page": fetcher.name}, int(fetcher.breaker.state == "open")
+        ))
+    gauges += [
+        ("response_cache.bytes", "Память кеша готовых ответов, байт", None, response_cache.size),
+        ("response_cache.entries", "Записей в кеше готовых ответов", None, len(response_cache)),
+        ("sse.subscribers", "Открытых SSE-подписок", None, replacements_hub.subscriber_count),
+        ("event_loop.blocked_seconds", "Сколько event loop был заблокирован, всего", None, loop_monitor.blocked_seconds_total),
+        ("event_loop.max_lag_seconds", "Максимальная задержка event loop", None, loop_monitor.max_lag)
+    ]
+    return PlainTextResponse(render_prometheus(gauges), media_type="text/plain; version=0.0.4")
+
+
+# MARK: - Синхронизация изменений
+
+def allocate_sync_version(schedule_version: int, replacements_version: int) -> Optional[int]:
+    """
+    Версия данных для пары снимков из общего хранилища: один номер на пару у всех
+    воркеров. Без хранилища (или при ошибке) ChangeLog выдаёт версию сам.
+    Запрос к SQLite короткий и выполняется только при публикации нового снимка.
+    """
+    if snapshot_store is None:
+        return None
+    try:
+        return snapshot_store.sync_version(schedule_version, replacements_version)
+    except Exception as e:
+        print(f"Не удалось получить версию данных из хранилища: {e}")
+        return None
+
+
+# Опубликованные версии данных (только хеши, см. changes.py); пополняется on_snapshot_change
+change_log = ChangeLog(limit=config.CHANGES_HISTORY, allocate=allocate_sync_version)
+
+
+@app.get("/api/changes")
+async def get_changes(
+    request: Request,
+    since: Optional[int] = Query(None, description="Версия из прошлого ответа /api/changes")
+):
+    """
+    Что изменилось с версии since: расписания каких групп, специальности,
+    week_info и замены каких групп. Без since или для неизвестной версии
+    возвращает full_resync: true — клиенту нужно загрузить всё заново.
+    """
+    try:
+        schedule = await get_snapshot()
+        replacements = await replacements_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
+    
+    current = change_log.current(schedule, replacements)
+    headers = freshness_headers(schedule_cache, replacements_cache)
+    etag = make_etag("changes", since, current.version)
+    if etag_matches(request, etag):
+        return not_modified(etag, "no-cache", headers)
+    
+    if since is None:
+        payload = {"version": current.version, "full_resync": True}
+    else:
+        payload = change_log.changes(since, current)
+    return json_response(request, payload, "no-cache", etag=etag, headers=headers)
+
+
 # MARK: - Замены
 
 @app.get("/api/replacements")
 async def get_replacements(
+    request: Request,
     group: Optional[str] = Query(None, description="Название группы для фильтрации (опционально)")
 ):
     """Получить замены в расписании. Если указана группа — только для неё."""
     try:
-        current_time = time.time()
+        # Замены кешируются на 2 минуты (они обновляются чаще)
+        snapshot = await replacements_cache.get()
         
-        # Кешируем замены на 2 минуты (они обновляются чаще)
-        if cache.get("replacements") is None or cache.get("replacements_update") is None or \
-           (current_time - cache.get("replacements_update", 0)) > 120:
-            print("Загрузка страницы замен...")
-            cache["replacements"] = await fetch_replacements()
-            cache["replacements_update"] = current_time
-            print(f"Загружено {sum(len(d.groups) for d in cache['replacements'].days)} групп с заменами")
+        if not group:
+            # Полный список один на снимок — сериализуется и сжимается один раз
+            return snapshot_response(
+                request, snapshot, REPLACEMENTS_CACHE_CONTROL, ("replacements",),
+                lambda: snapshot.replacements
+            )
         
-        replacements = cache["replacements"]
-        
-        # Фильтруем по группе если указана
-        if group:
-            replacements = get_replacements_for_group(replacements, group)
-        
-        return replacements
+        # Замены группы — точный поиск по индексу групп; тело готовится один раз
+        # на набор найденных групп, а не на каждое написание названия в запросе
+        tables = tuple(snapshot.group_tables(group))
+        return snapshot_response(
+            request, snapshot, REPLACEMENTS_CACHE_CONTROL, ("replacements-group", tables),
+            lambda: snapshot.for_group(group)
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Ошибка парсинга замен: {str(e)}")
 
 
+# MARK: - Подписка на замены (Server-Sent Events)
+
+replacements_hub = ReplacementsHub(
+    replacements_cache,
+    response_cache,
+    poll_interval=config.SSE_POLL_INTERVAL,
+    ping_interval=config.SSE_PING_INTERVAL,
+    max_subscribers=config.SSE_MAX_SUBSCRIBERS
+)
+
+# Сколько групп можно передать в одной подписке
+SSE_MAX_GROUPS = 10
+
+
+@app.get("/api/replacements/stream")
+async def stream_replacements(
+    group: list[str] = Query(..., description="Группа (можно передать несколько раз)")
+):
+    """
+    Подписка на замены групп (text/event-stream).
+    
+    Сразу после подключения приходит по событию replacements на группу,
+    дальше — только когда замены группы на странице действительно меняются.
+    """
+    groups = []
+    for name in group:
+        canonical = ReplacementsHub.canonical_group(name)
+        if canonical and canonical not in groups:
+            groups.append(canonical)
+    if not groups:
+        raise HTTPException(status_code=400, detail="Укажите хотя бы одну группу")
+    if len(groups) > SSE_MAX_GROUPS:
+        raise HTTPException(status_code=400, detail=f"Не больше {SSE_MAX_GROUPS} групп в одной подписке")
+    if replacements_hub.is_full:
+        raise HTTPException(status_code=503, detail="Слишком много подписчиков, повторите позже")
+    
+    return StreamingResponse(
+        replacements_hub.stream(groups),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# MARK: - Расписание с заменами
+
+# Индекс (группа, дата) -> день с заменами для текущей пары снимков
+effective_index: Optional[EffectiveIndex] = None
+
+# Насколько далеко от сегодняшнего дня можно запрашивать даты (память индекса ограничена)
+EFFECTIVE_MAX_DAYS = 31
+
+
+def build_effective_index(schedule: ScheduleSnapshot, replacements: ReplacementsSnapshot) -> EffectiveIndex:
+    """Индекс для пары снимков (строится один раз на пару)"""
+    global effective_index
+    if effective_index is None or not effective_index.is_for(schedule, replacements):
+        with timed("effective.build"):
+            effective_index = EffectiveIndex(schedule, replacements)
+    return effective_index
+
+
+async def get_effective_index() -> EffectiveIndex:
+    """
+    Индекс для текущих снимков. Обычно он уже построен при публикации снимка
+    (on_snapshot_change); здесь строится, только если этого не случилось.
+    """
+    schedule = await get_snapshot()
+    replacements = await replacements_cache.get()
+    return build_effective_index(schedule, replacements)
+
+
+@app.get("/api/effective-schedule", response_model=EffectiveSchedule)
+async def get_effective_schedule(
+    request: Request,
+    group: str = Query(..., description="Название группы, например 'Э-1-22, Э-11/1-23'"),
+    specialty_id: str = Query(..., description="ID специальности (tab_id)"),
+    dates: Optional[str] = Query(None, description="Даты через запятую, например '28.11.2025,29.11.2025'")
+):
+    """
+    Расписание группы на конкретные даты с уже применёнными заменами.
+    
+    По умолчанию — на даты со страницы замен (обычно сегодня и завтра).
+    Заменённые пары помечены is_replaced, отменённые — is_cancelled.
+    """
+    try:
+        index = await get_effective_index()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
+    
+    if dates:
+        try:
+            days = [parse_date(value) for value in dates.split(",") if value.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Даты должны быть в формате ДД.ММ.ГГГГ")
+        today = moscow_date()
+        if any(abs(day - today) > timedelta(days=EFFECTIVE_MAX_DAYS) for day in days):
+            raise HTTPException(
+                status_code=400, detail=f"Можно запросить даты не дальше {EFFECTIVE_MAX_DAYS} дней от сегодня"
+            )
+    else:
+        days = [parse_date(value) for value in index.dates] or [moscow_date()]
+    
+    key = (
+        "effective-schedule", group, specialty_id, ",".join(str(day) for day in days),
+        snapshot_tag(index.schedule), snapshot_tag(index.replacements)
+    )
+    etag = make_etag(*key)
+    headers = freshness_headers(schedule_cache, replacements_cache)
+    if etag_matches(request, etag):
+        return not_modified(etag, REPLACEMENTS_CACHE_CONTROL, headers)
+    
+    if index.schedule.get_schedule(group, specialty_id) is None:
+        raise HTTPException(status_code=404, detail=f"Расписание для группы '{group}' не найдено")
+    
+    # Зависит от обоих снимков: удаляется при публикации любого из них
+    prepared = response_cache.get_or_build(
+        (("schedule", "replacements"), *key),
+        lambda: PreparedBody(encode_json(index.schedule_for(specialty_id, group, days)), etag, level="fast")
+    )
+    return respond(request, prepared, REPLACEMENTS_CACHE_CONTROL, headers)
+
+
 # MARK: - Все преподаватели
 
+def teachers_payload(snapshot: ScheduleSnapshot) -> dict:
+    """Тело ответа /api/teachers (из индекса преподавателей, уже отсортирован)"""
+    teachers = list(snapshot.teachers)
+    return {
+        "count": len(teachers),
+        "teachers": teachers
+    }
+
+
+def teacher_schedule_payload(snapshot: ScheduleSnapshot, teacher: str) -> TeacherSchedule:
+    """Неделя преподавателя по дням"""
+    by_day = {}
+    for lesson in snapshot.teachers[teacher]:
+        by_day.setdefault(lesson.day_index, []).append(lesson)
+    
+    days = [
+        TeacherDay(
+            day=day_name,
+            day_index=i,
+            lessons=by_day.get(i, []),
+            is_day_off=i not in by_day
+        )
+        for i, day_name in enumerate(DAYS_NAMES)
+    ]
+    # Воскресенье показываем, только если в нём есть пары
+    if 6 in by_day:
+        days.append(TeacherDay(day="ВОСКРЕСЕНЬЕ", day_index=6, lessons=by_day[6]))
+    
+    return TeacherSchedule(teacher=teacher, week_info=snapshot.week_info, days=days)
+
+
 @app.get("/api/teachers")
-async def get_all_teachers():
+async def get_all_teachers(request: Request):
     """Получить список всех преподавателей из всех групп (без повторений)"""
     try:
-        soup = await get_soup()
-        specialties = parse_specialties(soup)
-        
-        all_teachers = set()
-        
-        for spec in specialties:
-            groups = parse_groups_for_specialty(soup, spec.id)
-            
-            for group in groups:
-                try:
-                    schedule = parse_schedule_for_group(soup, group.name, spec.id)
-                    if schedule:
-                        for day in schedule.days:
-                            for lesson in day.lessons:
-                                # Разделяем по запятым и добавляем
-                                if lesson.teacher:
-                                    for teacher in lesson.teacher.split(","):
-                                        name = teacher.strip()
-                                        if name and len(name) > 2:
-                                            all_teachers.add(name)
-                                if lesson.teacher_denominator:
-                                    for teacher in lesson.teacher_denominator.split(","):
-                                        name = teacher.strip()
-                                        if name and len(name) > 2:
-                                            all_teachers.add(name)
-                except Exception as e:
-                    print(f"Ошибка при парсинге группы {group.name}: {e}")
-                    continue
+        snapshot = await get_snapshot()
+        return snapshot_response(
+            request, snapshot, SCHEDULE_CACHE_CONTROL, ("teachers",), lambda: teachers_payload(snapshot)
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Ошибка получения преподавателей: {str(e)}")
+
+
+@app.get("/api/teacher-schedule", response_model=TeacherSchedule)
+async def get_teacher_schedule(
+    request: Request,
+    name: str = Query(..., description="ФИО преподавателя из /api/teachers, например 'И.И. Иванов'")
+):
+    """Получить расписание преподавателя на неделю (все группы)"""
+    try:
+        snapshot = await get_snapshot()
+        teacher = snapshot.find_teacher(name)
         
-        # Сортируем по алфавиту
-        sorted_teachers = sorted(list(all_teachers))
+        if teacher is None:
+            raise HTTPException(status_code=404, detail=f"Преподаватель '{name}' не найден")
         
-        return {
-            "count": len(sorted_teachers),
-            "teachers": sorted_teachers
-        }
+        return snapshot_response(
+            request, snapshot, SCHEDULE_CACHE_CONTROL, ("teacher-schedule", teacher),
+            lambda: teacher_schedule_payload(snapshot, teacher)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Ошибка получения преподавателей: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Ошибка получения расписания преподавателя: {str(e)}")
 
 
-# MARK: - Content API (Статичный контент, обновляемый через код)
+# MARK: - Content API (Статичный контент из файлов content/*.json)
 #
 # 🚀 БЫСТРОЕ ОБНОВЛЕНИЕ КОНТЕНТА:
-# 1. Измени рекламу/новости ниже
-# 2. Увеличь CONTENT_VERSION (например: "1.0" → "1.1")
-# 3. Git push → Render redeploy
-# 4. Пользователи получат обновления через 5 минут автоматически!
+# 1. Измени content/advertisements.json, news.json или resource_collections.json
+# 2. Git push → Render redeploy (или просто сохрани файл: сервер перечитает его сам)
+# 3. Версия контента — хеш содержимого, увеличивать её вручную не нужно
 #
 # ⚡ Пользователи проверяют обновления:
 #   - При открытии приложения
 #   - При открытии вкладки "Новости"  
 #   - Автоматически каждые 5 минут в фоне
+#
+# Один условный запрос /api/content/bundle заменяет проверку версии и три загрузки.
+
+# Новая версия контента: ответы, в которые он входит (/api/bootstrap), больше не нужны
+content_store = ContentStore(config.CONTENT_DIR, on_change=lambda content: response_cache.invalidate("content"))
 
-# Версия контента (ОБЯЗАТЕЛЬНО увеличивайте при любом изменении!)
-CONTENT_VERSION = "4.1"
 
 @app.get("/api/content/advertisements")
-async def get_content_advertisements():
+async def get_content_advertisements(request: Request):
     """
     Получить рекомендации для мобильного приложения
     
@@ -339,150 +1043,15 @@ async def get_content_advertisements():
     - gradientColors: массив HEX цветов для градиента ["#FF6B6B", "#4ECDC4"] (опционально)
     - isPinned: закреплённая реклама показывается первой (опционально)
     """
-    
-    # ИЗМЕНЯЙТЕ ЭТОТ СПИСОК ДЛЯ ОБНОВЛЕНИЯ РЕКОМЕНДАЦИЙ
-    advertisements = [
-        # === TELEGRAM КАНАЛЫ ===
-        {
-            "id": "tg-1",
-            "title": "Студенческий совет МПТ",
-            "subtitle": "Официальный канал с новостями и событиями в МПТ",
-            "description": "Официальный канал с новостями и событиями в МПТ для студентов и преподавателей. Подписывайся, чтобы не пропустить важные события и новости. А также получай полезные советы и рекомендации для студенческой жизни.",
-            "iconEmoji": "💻",
-            "url": "https://t.me/studsovetmpt",
-            "category": "telegram",
-            "tags": ["новое"],
-            "gradientColors": ["#0088cc", "#00aced"],
-            "isPinned": True
-        },
-        {
-            "id": "tg-2", 
-            "title": "Телеграм канал МПТ",
-            "subtitle": "Официальный канал с новостями и событиями в Телеграм канале МПТ",
-            "description": "Официальный канал с новостями и событиями в Телеграм канале МПТ для студентов и преподавателей. Подписывайся, чтобы не пропустить важные события и новости. А также получай полезные советы и рекомендации для студенческой жизни.",
-            "iconEmoji": "💻",
-            "url": "https://t.me/mpt_community_official",
-            "category": "telegram",
-            "gradientColors": ["#0088cc", "#00aced"]
-        },
-        
-        # === ОНЛАЙН-ШКОЛЫ ===
-        {
-            "id": "school-1",
-            "title": "Яндекс.Практикум",
-            "subtitle": "Бесплатные курсы для старта",
-            "description": "Онлайн-курсы по Data Science, веб-разработке, дизайну и маркетингу. Первые уроки бесплатно — попробуй и реши, подходит ли тебе профессия.",
-            "iconEmoji": "🎓",
-            "url": "https://practicum.yandex.ru",
-            "category": "onlineSchool",
-            "tags": ["бесплатно"],
-            "gradientColors": ["#FF0000", "#FF6B6B"]
-        },
-        {
-            "id": "school-2",
-            "title": "Stepik",
-            "subtitle": "Бесплатные курсы от университетов",
-            "description": "Тысячи бесплатных курсов по программированию, математике, физике и другим наукам. Сертификаты о прохождении. Идеально для самообучения!",
-            "iconEmoji": "📚",
-            "url": "https://stepik.org",
-            "category": "course",
-            "tags": ["бесплатно", "топ"],
-            "gradientColors": ["#00C853", "#69F0AE"]
-        },
-        
-        # === YOUTUBE КАНАЛЫ ===
-        {
-            "id": "yt-1",
-            "title": "Хауди Хо",
-            "subtitle": "Программирование простым языком",
-            "description": "Один из лучших YouTube-каналов о программировании на русском языке. Туториалы по Python, JavaScript, веб-разработке. Подходит для начинающих!",
-            "iconEmoji": "🎬",
-            "url": "https://youtube.com/@HowdyHo",
-            "category": "youtube",
-            "tags": ["топ"],
-            "gradientColors": ["#FF0000", "#CC0000"]
-        },
-        {
-            "id": "yt-2",
-            "title": "Winderton",
-            "subtitle": "Мотивация и саморазвитие в IT",
-            "description": "Канал о том, как стать успешным разработчиком. Советы по карьере, мотивация, истории успеха. Для тех, кто хочет расти в IT.",
-            "iconEmoji": "🚀",
-            "url": "https://youtube.com/@winderton",
-            "category": "youtube",
-            "gradientColors": ["#9C27B0", "#E040FB"]
-        },
-        
-        # === КУРСЫ ===
-        {
-            "id": "course-1",
-            "title": "HTML Academy",
-            "subtitle": "Интерактивное обучение веб-разработке",
-            "description": "Лучшие интерактивные курсы по HTML, CSS и JavaScript. Учись на практике — пиши код прямо в браузере. Есть бесплатные курсы для старта.",
-            "iconEmoji": "🌐",
-            "url": "https://htmlacademy.ru",
-            "category": "course",
-            "tags": ["бесплатно"],
-            "gradientColors": ["#FF6B35", "#F7C59F"]
-        },
-        {
-            "id": "course-2",
-            "title": "CS50 на русском",
-            "subtitle": "Легендарный курс Гарварда",
-            "description": "Знаменитый курс по основам программирования от Гарварда, переведённый на русский. Бесплатно, качественно, для всех уровней.",
-            "iconEmoji": "🏛️",
-            "url": "https://javarush.com/quests/lectures/questharvard.level00.lecture00",
-            "category": "course",
-            "tags": ["бесплатно", "топ"],
-            "gradientColors": ["#1E3A8A", "#3B82F6"]
-        },
-        
-        # === СЕРВИСЫ ===
-        {
-            "id": "service-1",
-            "title": "GitHub Student Pack",
-            "subtitle": "Бесплатные инструменты для студентов",
-            "description": "Огромный набор бесплатных инструментов для студентов: домены, хостинг, IDE, курсы и многое другое. Нужна только студенческая почта!",
-            "iconEmoji": "🎁",
-            "url": "https://education.github.com/pack",
-            "category": "service",
-            "tags": ["бесплатно", "топ"],
-            "gradientColors": ["#24292e", "#6e7681"],
-            "isPinned": True
-        }
-    ]
-    
-    return {"advertisements": advertisements}
+    return respond(request, content_store.current.sections["advertisements"], CONTENT_CACHE_CONTROL)
 
 @app.get("/api/content/news") 
-async def get_content_news():
+async def get_content_news(request: Request):
     """Получить новости для мобильного приложения"""
-    # ИЗМЕНЯЙТЕ ЭТОТ СПИСОК ДЛЯ ОБНОВЛЕНИЯ НОВОСТЕЙ
-    news = [
-        {
-            "id": "1",
-            "imageName": "news_0",
-            "title": "Экскурсия",
-            "description": "Студенты МПТ на экскурсии"
-        },
-        {
-            "id": "2", 
-            "imageName": "news_1",  # Имя файла БЕЗ расширения (файл должен быть в папке news/ проекта)
-            "title": "Новости колледжа",
-            "description": "Следите за событиями"
-        },
-        {
-            "id": "3",
-            "imageName": "news_4",
-            "title": "Робототехника",
-            "description": "Студенты МПТ на всероссийском турнире" 
-        }
-    ]
-    
-    return {"news": news}
+    return respond(request, content_store.current.sections["news"], CONTENT_CACHE_CONTROL)
 
 @app.get("/api/content/resource-collections")
-async def get_resource_collections():
+async def get_resource_collections(request: Request):
     """
     Получить подборки ресурсов (закреплённые плашки с несколькими ссылками)
     
@@ -493,151 +1062,105 @@ async def get_resource_collections():
     - iconName: имя файла из Assets.xcassets для своей иконки (например "skillbox_logo")
     Если указано iconName, оно имеет приоритет над icon (эмодзи)
     """
-    collections = [
-        # === ИНФОРМАЦИОННАЯ БЕЗОПАСНОСТЬ ===
-        {
-            "id": "security",
-            "title": "🔐 Информационная безопасность",
-            "subtitle": "Каналы по кибербезопасности и хакингу",
-            "category": "security",
-            "gradientColors": ["#FF6B6B", "#EE5A24"],
-            "isPinned": True,
-            "iconName": "security_icon",  # Можно указать имя фото из Assets: "security_icon"
-            "resources": [
-                {
-                    "id": "sec-1",
-                    "title": "Kali Linux",
-                    "description": "Главные ресурсы для хакера, инструменты, туториалы",
-                    "url": "https://t.me/linuxkalii",
-                    "icon": "🐧",
-                    "iconName": None,  # Можно указать: "kali_logo"
-                    "subscribers": "52.9K+"
-                },
-                {
-                    "id": "sec-2", 
-                    "title": "InfoSec Community",
-                    "description": "Один из ведущих каналов по информационной безопасности",
-                    "url": "https://t.me/infosec_tg",
-                    "icon": "🛡️",
-                    "iconName": None,
-                    "subscribers": "10.3K+"
-                },
-                {
-                    "id": "sec-3",
-                    "title": "IT Архив",
-                    "description": "Парсим свежие фриланс заказы каждый день",
-                    "url": "https://t.me/bkstorage",
-                    "icon": "📁",
-                    "iconName": None,
-                    "subscribers": "6.2K+"
-                }
-            ]
-        },
-        
-        # === ПРОГРАММИРОВАНИЕ ===
-        {
-            "id": "programming",
-            "title": "💻 Программирование",
-            "subtitle": "Лучшие каналы для разработчиков",
-            "category": "programming",
-            "gradientColors": ["#6C5CE7", "#A29BFE"],
-            "isPinned": True,
-            "iconName": None,  # Можно указать: "programming_icon"
-            "resources": [
-                {
-                    "id": "prog-1",
-                    "title": "PYTHON:TODAY",
-                    "description": "Python скрипты, нейросети, боты, автоматизация. Всё бесплатно!",
-                    "url": "https://t.me/python2day",
-                    "icon": "🐍",
-                    "iconName": None,
-                    "subscribers": "63.5K+"
-                },
-                {
-                    "id": "prog-2",
-                    "title": "Python Developer",
-                    "description": "Авторский канал действующего Python-разработчика",
-                    "url": "https://t.me/python_tg",
-                    "icon": "👨‍💻",
-                    "iconName": None,
-                    "subscribers": "22K+"
-                },
-                {
-                    "id": "prog-3",
-                    "title": "Хауди Хо",
-                    "description": "YouTube канал о программировании простым языком",
-                    "url": "https://youtube.com/@HowdyHo",
-                    "icon": "🎬",
-                    "iconName": None,
-                    "subscribers": "1M"
-                },
-                {
-                    "id": "prog-4",
-                    "title": "Stepik",
-                    "description": "Бесплатные курсы по программированию от университетов",
-                    "url": "https://stepik.org",
-                    "icon": "📚",
-                    "iconName": None,
-                    "subscribers": "100K+"
-                }
-            ]
-        },
-        
-        # === ЮРИСПРУДЕНЦИЯ ===
-        {
-            "id": "law",
-            "title": "⚖️ Юриспруденция",
-            "subtitle": "Полезные ресурсы для будущих юристов",
-            "category": "law",
-            "gradientColors": ["#00B894", "#55EFC4"],
-            "isPinned": True,
-            "iconName": None,  # Можно указать: "law_icon"
-            "resources": [
-                {
-                    "id": "law-1",
-                    "title": "КонсультантПлюс",
-                    "description": "Правовые базы, законодательство, судебная практика",
-                    "url": "https://www.consultant.ru",
-                    "icon": "📖",
-                    "iconName": None,
-                    "subscribers": "100K+"
-                },
-                {
-                    "id": "law-2",
-                    "title": "Гарант",
-                    "description": "Информационно-правовой портал",
-                    "url": "https://www.garant.ru",
-                    "icon": "⚖️",
-                    "iconName": None,
-                    "subscribers": "100K+"
-                },
-                {
-                    "id": "law-3",
-                    "title": "Право.ru",
-                    "description": "Новости права, аналитика, обзоры законодательства",
-                    "url": "https://pravo.ru",
-                    "icon": "📰",
-                    "iconName": None,
-                    "subscribers": "100K+"
-                }
-            ]
-        }
-    ]
-    
-    return {"collections": collections}
+    return respond(request, content_store.current.sections["collections"], CONTENT_CACHE_CONTROL)
 
 @app.get("/api/content/version")
-async def get_content_version():
+async def get_content_version(request: Request):
     """Проверка версии контента"""
+    return respond(request, content_store.current.version_body, CONTENT_CACHE_CONTROL)
+
+@app.get("/api/content/bundle")
+async def get_content_bundle(request: Request):
+    """
+    Весь контент одним ответом: версия, рекомендации, новости и подборки.
+    
+    ETag зависит только от содержимого, поэтому периодическая проверка —
+    один запрос с If-None-Match, который почти всегда получает 304.
+    """
+    return respond(request, content_store.current.bundle, CONTENT_CACHE_CONTROL)
+
+
+# MARK: - Первый запуск приложения
+
+def bootstrap_payload(snapshot: ScheduleSnapshot, replacements: ReplacementsSnapshot, content,
+                      group: str, specialty_id: str, schedule: WeekSchedule) -> dict:
+    """
+    Тело /api/bootstrap: то же, что отдают отдельные эндпоинты, плюс их ETag,
+    чтобы следующие запросы приложения сразу были условными.
+    """
+    schedule_tag = snapshot_tag(snapshot)
+    tables = tuple(replacements.group_tables(group))
     return {
-        "version": CONTENT_VERSION,
-        "timestamp": "2024-11-30T12:00:00Z"
+        # Версия данных для /api/changes?since=
+        "version": change_log.current(snapshot, replacements).version,
+        "etags": {
+            "week_info": make_etag("week-info", schedule_tag),
+            "specialties": make_etag("specialties", schedule_tag),
+            "groups": make_etag("groups", specialty_id, schedule_tag),
+            "schedule": make_etag("schedule", group, specialty_id, schedule_tag),
+            "replacements": make_etag("replacements-group", tables, snapshot_tag(replacements)),
+            "content": content.bundle.etag
+        },
+        "week_info": snapshot.week_info,
+        "specialties": snapshot.specialties,
+        "groups": snapshot.get_groups(specialty_id),
+        "schedule": schedule,
+        "replacements": replacements.for_group(group),
+        "content": {"version": content.version, "timestamp": content.timestamp}
     }
 
 
+@app.get("/api/bootstrap")
+async def get_bootstrap(
+    request: Request,
+    group: str = Query(..., description="Название группы, например 'Э-1-22, Э-11/1-23'"),
+    specialty_id: str = Query(..., description="ID специальности (tab_id)")
+):
+    """
+    Всё, что нужно приложению при запуске, одним ответом: неделя, специальности,
+    группы специальности, расписание и замены группы, версия контента.
+    
+    Тело собирается и сжимается один раз на группу и версии снимков и контента.
+    """
+    try:
+        snapshot, replacements = await asyncio.gather(get_snapshot(), replacements_cache.get())
+        content = content_store.current
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка парсинга: {str(e)}")
+    
+    # Версия из ответа — отправная точка для /api/changes?since=, её хеши нужно запомнить
+    change_log.current(snapshot, replacements)
+    
+    key = (
+        "bootstrap", group, specialty_id,
+        snapshot_tag(snapshot), snapshot_tag(replacements), content.version
+    )
+    etag = make_etag(*key)
+    headers = freshness_headers(schedule_cache, replacements_cache)
+    if etag_matches(request, etag):
+        return not_modified(etag, REPLACEMENTS_CACHE_CONTROL, headers)
+    
+    schedule = snapshot.get_schedule(group, specialty_id)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail=f"Расписание для группы '{group}' не найдено")
+    
+    # Зависит от обоих снимков и контента: удаляется при изменении любого из них
+    prepared = response_cache.get_or_build(
+        (("schedule", "replacements", "content"), *key),
+        lambda: PreparedBody(encode_json(
+            bootstrap_payload(snapshot, replacements, content, group, specialty_id, schedule)
+        ), etag)
+    )
+    return respond(request, prepared, REPLACEMENTS_CACHE_CONTROL, headers)
+
+
 if __name__ == "__main__":
     import uvicorn
     import os
     # Render автоматически устанавливает переменную PORT
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    if config.WORKERS > 1:
+        # Несколько воркеров: страницы mpt.ru загружает один лидер (см. MPT_SNAPSHOT_DB)
+        uvicorn.run("main:app", host="0.0.0.0", port=port, workers=config.WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,266 @@
+import asyncio
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Optional
+
+
+# Границы корзин гистограмм, секунды (от отдачи из кеша до таймаута mpt.ru)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Timing:
+    """Счётчик длительностей одной операции (с гистограммой для /metrics)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 6),
+            "avg_seconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "max_seconds": round(self.max, 6),
+            "last_seconds": round(self.last, 6)
+        }
+
+
+# Ключ — имя метрики с метками: 'upstream.fetch{page="schedule"}'
+timings: dict[str, Timing] = {}
+counters: dict[str, int] = {}
+
+# В потоке пула (или процессе) замеры копятся здесь и переносятся в event loop
+_collector = threading.local()
+
+
+def metric_key(name: str, labels: Optional[dict] = None) -> str:
+    """Имя метрики вместе с метками в синтаксисе Prometheus"""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def increment(name: str, value: int = 1, labels: Optional[dict] = None):
+    """Увеличивает счётчик name"""
+    key = metric_key(name, labels)
+    counters[key] = counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, labels: Optional[dict] = None):
+    """Записывает длительность операции name"""
+    key = metric_key(name, labels)
+    collected = getattr(_collector, "items", None)
+    if collected is not None:
+        collected.append((key, seconds))
+        return
+    timing = timings.get(key)
+    if timing is None:
+        timing = timings[key] = Timing()
+    timing.observe(seconds)
+
+
+@contextmanager
+def timed(name: str, labels: Optional[dict] = None):
+    """Замеряет длительность блока: with timed("parse.page", {"page": "schedule"}): ..."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, labels)
+
+
+def collect(func: Callable, *args, **kwargs) -> tuple[Any, list[tuple[str, float]]]:
+    """
+    Выполняет func, собирая её замеры отдельно (для пула парсинга).
+
+    Замеры из процесса пула иначе потерялись бы, а из потока — писались бы
+    в общие словари параллельно с event loop. Вызывающий переносит их
+    через merge().
+    """
+    _collector.items = []
+    try:
+        result = func(*args, **kwargs)
+        return result, _collector.items
+    finally:
+        _collector.items = None
+
+
+def merge(collected: Iterable[tuple[str, float]]):
+    """Переносит замеры, собранные collect(), в общие timings"""
+    for key, seconds in collected:
+        timing = timings.get(key)
+        if timing is None:
+            timing = timings[key] = Timing()
+        timing.observe(seconds)
+
+
+# MARK: - Формат Prometheus
+
+_KEY = re.compile(r"^([^{]+)(\{.*\})?$")
+
+
+def _prometheus_name(name: str, suffix: str) -> str:
+    return "mpt_" + re.sub(r"[^a-zA-Z0-9_]", "_", name) + suffix
+
+
+def _split_key(key: str) -> tuple[str, str]:
+    match = _KEY.match(key)
+    return match.group(1), match.group(2) or ""
+
+
+def _with_label(labels: str, extra: str) -> str:
+    if not labels:
+        return "{" + extra + "}"
+    return labels[:-1] + "," + extra + "}"
+
+
+def render_prometheus(gauges: Iterable[tuple[str, str, Optional[dict], Any]] = ()) -> str:
+    """
+    Все метрики в текстовом формате Prometheus.
+
+    timings -> гистограммы mpt_<имя>_seconds, counters -> mpt_<имя>_total,
+    gauges — (имя, описание, метки, значение) на момент запроса.
+    """
+    lines = []
+
+    histograms: dict[str, list[tuple[str, Timing]]] = {}
+    for key, timing in timings.items():
+        name, labels = _split_key(key)
+        histograms.setdefault(_prometheus_name(name, "_seconds"), []).append((labels, timing))
+    for name, series in sorted(histograms.items()):
+        lines.append(f"# TYPE {name} histogram")
+        for labels, timing in series:
+            cumulative = 0
+            for bound, count in zip(BUCKETS, timing.buckets):
+                cumulative += count
+                le = _with_label(labels, 'le="%s"' % bound)
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            le = _with_label(labels, 'le="+Inf"')
+            lines.append(f"{name}_bucket{le} {timing.count}")
+            lines.append(f"{name}_sum{labels} {timing.total:.6f}")
+            lines.append(f"{name}_count{labels} {timing.count}")
+
+    totals: dict[str, list[tuple[str, int]]] = {}
+    for key, value in counters.items():
+        name, labels = _split_key(key)
+        totals.setdefault(_prometheus_name(name, "_total"), []).append((labels, value))
+    for name, series in sorted(totals.items()):
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in series:
+            lines.append(f"{name}{labels} {value}")
+
+    described = set()
+    for name, help_text, labels, value in gauges:
+        metric = _prometheus_name(name, "")
+        if metric not in described:
+            described.add(metric)
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric}{metric_key('', labels)} {value if isinstance(value, int) else round(value, 6)}")
+
+    return "\n".join(lines) + "\n"
+
+
+class LoopLagMonitor:
+    """
+    Измеряет, насколько event loop был заблокирован.
+
+    Задача засыпает на interval секунд; всё, на что пробуждение опоздало,
+    event loop был занят синхронной работой (например, парсингом HTML).
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.blocked_seconds_total = 0.0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.samples += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.blocked_seconds_total += lag
+
+    def to_dict(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "samples": self.samples,
+            "blocked_seconds_total": round(self.blocked_seconds_total, 6),
+            "max_lag_seconds": round(self.max_lag, 6),
+            "last_lag_seconds": round(self.last_lag, 6)
+        }
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI-middleware: время ответа по маршрутам (mpt_http_request_seconds).
+
+    Маршрут берётся из шаблона пути ("/api/schedule"), а не из URL, чтобы
+    параметры не раздували число серий. Потоки SSE не замеряются: их
+    длительность — это время жизни подключения.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500, "stream": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                for name, value in message.get("headers", []):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        status["stream"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not status["stream"]:
+                route = scope.get("route")
+                labels = {
+                    "method": scope["method"],
+                    "route": getattr(route, "path", "unmatched"),
+                    "status": status["code"]
+                }
+                observe("http.request", time.perf_counter() - started, labels)
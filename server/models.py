@@ -54,6 +54,16 @@ class ScheduleResponse(BaseModel):
     schedule: WeekSchedule
 
 
+class GroupRef(BaseModel):
+    group: str                   # "Э-1-22, Э-11/1-23"
+    specialty_id: str            # tab_id специальности
+
+
+class SchedulesRequest(BaseModel):
+    groups: list[GroupRef] = []          # Конкретные группы
+    specialty_id: Optional[str] = None   # Или все группы специальности
+
+
 # MARK: - Замены
 
 class Replacement(BaseModel):
@@ -78,3 +88,58 @@ class DayReplacements(BaseModel):
 class ReplacementsResponse(BaseModel):
     days: list[DayReplacements]   # Замены по дням
 
+
+
+# MARK: - Преподаватели
+
+class TeacherLesson(BaseModel):
+    number: int                   # Номер пары
+    subject: str                  # Предмет
+    group: str                    # Группа
+    specialty_id: str             # ID специальности группы
+    day: str                      # "ПОНЕДЕЛЬНИК", ...
+    day_index: int                # 0-6 (пн-вс)
+    campus: Optional[str] = None  # Территория
+    week_type: Optional[WeekType] = None  # Только по числителю/знаменателю (None — каждую неделю)
+
+
+class TeacherDay(BaseModel):
+    day: str
+    day_index: int
+    lessons: list[TeacherLesson]
+    is_day_off: bool = False
+
+
+class TeacherSchedule(BaseModel):
+    teacher: str                  # ФИО преподавателя
+    week_info: WeekInfo
+    days: list[TeacherDay]        # Неделя (пн-сб)
+
+
+# MARK: - Расписание с заменами
+
+class EffectiveLesson(BaseModel):
+    number: int                   # Номер пары
+    subject: str                  # Предмет с учётом недели и замены
+    teacher: str                  # Преподаватель ("" — если пара заменена)
+    is_replaced: bool = False     # Пара заменена
+    is_cancelled: bool = False    # Замена отменяет пару
+    original_subject: Optional[str] = None  # Что заменяют (как на странице замен)
+    replaced_at: Optional[str] = None       # Когда добавлена замена
+
+
+class EffectiveDay(BaseModel):
+    date: str                     # "28.11.2025"
+    day: str                      # "ПЯТНИЦА"
+    day_index: int                # 0-6 (пн-вс)
+    week_type: WeekType           # Числитель/знаменатель этой даты
+    campus: Optional[str] = None
+    has_replacements: bool = False
+    lessons: list[EffectiveLesson]
+    is_day_off: bool = False
+
+
+class EffectiveSchedule(BaseModel):
+    group: str
+    specialty_id: str
+    days: list[EffectiveDay]
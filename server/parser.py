@@ -1,4 +1,3 @@
-import httpx
 from bs4 import BeautifulSoup
 from typing import Optional
 import re
@@ -6,9 +5,11 @@ from models import (
     WeekInfo, WeekType, Specialty, Group, 
     Lesson, DaySchedule, WeekSchedule
 )
+import upstream
+import config
 
 
-BASE_URL = "https://mpt.ru/raspisanie/"
+BASE_URL = config.BASE_URL
 
 # Маппинг дней недели
 DAYS_MAP = {
@@ -25,11 +26,15 @@ DAYS_NAMES = ["ПОНЕДЕЛЬНИК", "ВТОРНИК", "СРЕДА", "ЧЕТ
 
 
 async def fetch_page(url: str = BASE_URL) -> str:
-    """Загружает HTML страницу"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, timeout=30.0)
-        response.raise_for_status()
-        return response.text
+    """Загружает HTML страницу (через общий клиент upstream)"""
+    response = await upstream.get(url)
+    response.raise_for_status()
+    return response.text
+
+
+def parse_document(html: str) -> BeautifulSoup:
+    """Строит дерево BeautifulSoup из HTML страницы"""
+    return BeautifulSoup(html, "lxml")
 
 
 def parse_week_info(soup: BeautifulSoup) -> WeekInfo:
@@ -145,12 +150,67 @@ def parse_specialties(soup: BeautifulSoup) -> list[Specialty]:
 
 def parse_groups_for_specialty(soup: BeautifulSoup, specialty_tab_id: str) -> list[Group]:
     """Парсит группы для конкретной специальности по ID таба"""
-    groups = []
+    # Находим div с контентом специальности
+    tab_content = soup.find("div", id=specialty_tab_id)
+    if not tab_content:
+        return []
+    
+    return _parse_groups_in_tab(tab_content, specialty_tab_id)
+
+
+def parse_schedule_for_group(soup: BeautifulSoup, group_name: str, specialty_tab_id: str) -> Optional[WeekSchedule]:
+    """Парсит расписание для конкретной группы"""
     
     # Находим div с контентом специальности
     tab_content = soup.find("div", id=specialty_tab_id)
     if not tab_content:
-        return groups
+        return None
+    
+    group_pane = _find_group_pane(tab_content, group_name)
+    if not group_pane:
+        return None
+    
+    return _parse_group_pane(group_pane, group_name, specialty_tab_id)
+
+
+def parse_specialty(soup: BeautifulSoup, specialty_tab_id: str) -> tuple[list[Group], dict[str, WeekSchedule]]:
+    """
+    Парсит группы и расписания всех групп специальности за один проход по табу.
+    
+    Результат совпадает с parse_groups_for_specialty + parse_schedule_for_group
+    для каждой группы, но tab-pane не перебираются заново на каждую группу.
+    """
+    tab_content = soup.find("div", id=specialty_tab_id)
+    if not tab_content:
+        return [], {}
+    
+    groups = _parse_groups_in_tab(tab_content, specialty_tab_id)
+    panes = _index_group_panes(tab_content)
+    heading_parents = None
+    
+    schedules = {}
+    for group in groups:
+        if group.name in schedules:
+            continue
+        
+        heading = f"Группа {group.name}"
+        group_pane = panes.get(heading)
+        if not group_pane:
+            # Как и в parse_schedule_for_group: ищем h3 напрямую
+            if heading_parents is None:
+                heading_parents = _index_heading_parents(tab_content)
+            group_pane = heading_parents.get(heading)
+        if not group_pane:
+            continue
+        
+        schedules[group.name] = _parse_group_pane(group_pane, group.name, specialty_tab_id)
+    
+    return groups, schedules
+
+
+def _parse_groups_in_tab(tab_content, specialty_tab_id: str) -> list[Group]:
+    """Собирает группы из div специальности"""
+    groups = []
     
     # Внутри специальности есть вложенные табы для групп
     # Ищем все tab-pane внутри специальности
@@ -185,38 +245,41 @@ def parse_groups_for_specialty(soup: BeautifulSoup, specialty_tab_id: str) -> li
     return groups
 
 
-def parse_schedule_for_group(soup: BeautifulSoup, group_name: str, specialty_tab_id: str) -> Optional[WeekSchedule]:
-    """Парсит расписание для конкретной группы"""
-    
-    # Находим div с контентом специальности
-    tab_content = soup.find("div", id=specialty_tab_id)
-    if not tab_content:
-        return None
-    
-    # Ищем tab-pane с нужной группой
-    group_pane = None
-    group_tabs = tab_content.find_all("div", class_="tab-pane")
-    
-    for group_tab in group_tabs:
+def _index_group_panes(tab_content) -> dict:
+    """Заголовок h3 -> первый tab-pane с таким заголовком"""
+    panes = {}
+    for group_tab in tab_content.find_all("div", class_="tab-pane"):
         h3 = group_tab.find("h3")
         if h3:
-            text = h3.get_text(strip=True)
-            if f"Группа {group_name}" == text:
-                group_pane = group_tab
-                break
+            panes.setdefault(h3.get_text(strip=True), group_tab)
+    return panes
+
+
+def _index_heading_parents(tab_content) -> dict:
+    """Заголовок h3 -> родительский контейнер первого такого h3"""
+    parents = {}
+    for h3 in tab_content.find_all("h3"):
+        parents.setdefault(h3.get_text(strip=True), h3.parent)
+    return parents
+
+
+def _find_group_pane(tab_content, group_name: str):
+    """Ищет контейнер с расписанием группы внутри div специальности"""
+    heading = f"Группа {group_name}"
+    
+    # Ищем tab-pane с нужной группой
+    group_pane = _index_group_panes(tab_content).get(heading)
     
     if not group_pane:
         # Если tab-pane не найден, пробуем искать h3 напрямую
-        h3_elements = tab_content.find_all("h3")
-        for h3 in h3_elements:
-            text = h3.get_text(strip=True)
-            if f"Группа {group_name}" == text:
-                # Берём родительский контейнер
-                group_pane = h3.parent
-                break
+        # и берём родительский контейнер
+        group_pane = _index_heading_parents(tab_content).get(heading)
     
-    if not group_pane:
-        return None
+    return group_pane
+
+
+def _parse_group_pane(group_pane, group_name: str, specialty_tab_id: str) -> WeekSchedule:
+    """Парсит недельное расписание из контейнера группы"""
     
     # Собираем все таблицы в этом tab-pane
     days_schedule = []
@@ -383,7 +446,7 @@ def get_all_groups_from_soup(soup: BeautifulSoup, specialties: list[Specialty])
 
 # MARK: - Парсинг замен
 
-REPLACEMENTS_URL = "https://mpt.ru/izmeneniya-v-raspisanii/"
+REPLACEMENTS_URL = config.REPLACEMENTS_URL
 
 from models import Replacement, GroupReplacements, DayReplacements, ReplacementsResponse
 from datetime import datetime
@@ -392,8 +455,7 @@ from datetime import datetime
 async def fetch_replacements() -> ReplacementsResponse:
     """Загружает и парсит страницу замен"""
     html = await fetch_page(REPLACEMENTS_URL)
-    soup = BeautifulSoup(html, "lxml")
-    return parse_replacements(soup)
+    return parse_replacements(parse_document(html))
 
 
 def parse_replacements(soup: BeautifulSoup) -> ReplacementsResponse:
@@ -498,16 +560,34 @@ def parse_replacement_table(table) -> list[Replacement]:
     return replacements
 
 
+def group_tokens(name: str) -> list[str]:
+    """
+    Канонические имена групп из названия: "Э-1-22, Э-11/1-23" -> ["Э-1-22", "Э-11/1-23"].
+    
+    Регистр и пробелы не важны, поэтому "э-1-22" и "Э-1-22 " дают один токен.
+    """
+    tokens = []
+    for part in name.split(","):
+        token = "".join(part.split()).upper()
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def group_matches(group_name: str, replacement_group: str) -> bool:
+    """Относится ли таблица замен к группе: совпадает хотя бы одна группа из названия"""
+    return not set(group_tokens(group_name)).isdisjoint(group_tokens(replacement_group))
+
+
 def get_replacements_for_group(replacements: ReplacementsResponse, group_name: str) -> ReplacementsResponse:
     """Фильтрует замены только для конкретной группы"""
     filtered_days = []
     
     for day in replacements.days:
-        # Ищем группу (учитываем что название может быть частью)
+        # Ищем группу (название может быть составным: "Э-1-22, Э-11/1-23")
         matching_groups = []
         for group in day.groups:
-            # Проверяем совпадение (группа может быть "Э-1-22, Э-11/1-23")
-            if group_name in group.group_name or group.group_name in group_name:
+            if group_matches(group_name, group.group_name):
                 matching_groups.append(group)
         
         if matching_groups:
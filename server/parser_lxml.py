@@ -0,0 +1,479 @@
+"""
+Парсер mpt.ru на чистом lxml (XPath) — альтернатива parser.py на BeautifulSoup.
+
+Функции повторяют parser.py один в один и возвращают те же модели из models.py,
+но работают с деревом lxml.html и заранее скомпилированными XPath-выражениями.
+Совпадение результатов проверяется в test_parser_backends.py.
+"""
+import re
+from datetime import datetime
+from typing import Optional
+
+import lxml.html
+from lxml import etree
+
+from models import (
+    WeekInfo, WeekType, Specialty, Group,
+    Lesson, DaySchedule, WeekSchedule,
+    Replacement, GroupReplacements, DayReplacements, ReplacementsResponse
+)
+from parser import DAYS_MAP, DAYS_NAMES
+
+
+def _has_class(name: str) -> str:
+    """XPath-условие «в атрибуте class есть имя name» (как class_= в bs4)"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Текст элемента без комментариев и содержимого script/style (как get_text в bs4)
+_TEXT = etree.XPath(
+    ".//text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::template)]"
+)
+
+_H2 = etree.XPath("//h2")
+_H3 = etree.XPath("//h3")
+_H4 = etree.XPath("//h4")
+_FIRST_NAV_TABS = etree.XPath(f"(//ul[{_has_class('nav-tabs')}])[1]")
+_NEXT_NAV_TABS = etree.XPath(
+    f"(descendant::ul[{_has_class('nav-tabs')}] | following::ul[{_has_class('nav-tabs')}])[1]"
+)
+_DIV_BY_ID = etree.XPath("(//div[@id = $id])[1]")
+_TAB_PANES = etree.XPath(f"descendant::div[{_has_class('tab-pane')}]")
+_LABEL_DANGER = etree.XPath(f"(descendant::div[{_has_class('label-danger')}])[1]")
+_LABEL_INFO = etree.XPath(f"(descendant::div[{_has_class('label-info')}])[1]")
+
+MONTHS = ["Января", "Февраля", "Марта", "Апреля", "Мая", "Июня",
+          "Июля", "Августа", "Сентября", "Октября", "Ноября", "Декабря"]
+
+
+def parse_document(html: str):
+    """Строит дерево lxml из HTML страницы"""
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml не принимает str с XML-декларацией кодировки
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+
+
+def _text(element) -> str:
+    """Аналог element.get_text(strip=True)"""
+    return "".join(part.strip() for part in _TEXT(element))
+
+
+def _find(element, tag: str):
+    """Первый потомок с тегом tag (аналог element.find(tag))"""
+    return next(element.iterdescendants(tag), None)
+
+
+def _first(result):
+    return result[0] if result else None
+
+
+def parse_week_info(root) -> WeekInfo:
+    """Парсит информацию о текущей неделе"""
+    date_text = ""
+    week_type = WeekType.NUMERATOR
+    week_type_ru = "Числитель"
+
+    # Ищем h2 с датой (формат: "27 Ноября - Четверг")
+    for h2 in _H2(root):
+        text = _text(h2)
+        if any(month in text for month in MONTHS):
+            date_text = text
+            break
+
+    # Ищем h3 с типом недели
+    for h3 in _H3(root):
+        text = _text(h3)
+        if "Неделя:" in text:
+            if "Знаменатель" in text:
+                week_type = WeekType.DENOMINATOR
+                week_type_ru = "Знаменатель"
+            break
+
+    return WeekInfo(
+        date=date_text,
+        week_type=week_type,
+        week_type_ru=week_type_ru
+    )
+
+
+def parse_specialties(root) -> list[Specialty]:
+    """Парсит список специальностей из табов и заголовков h2"""
+    specialties = []
+    found_ids = set()
+    found_names = set()
+
+    # Табы специальностей верхнего уровня
+    nav_tabs = _first(_FIRST_NAV_TABS(root))
+    if nav_tabs is not None:
+        for li in nav_tabs.iterdescendants("li"):
+            a_tag = _find(li, "a")
+            if a_tag is None:
+                continue
+            text = _text(a_tag)
+            tab_id = a_tag.get("href", "").replace("#", "")
+
+            if tab_id and tab_id not in found_ids and text not in found_names:
+                # Формат: "09.02.01 Э" или "09.02.07 ИС, БД, ВД"
+                match = re.match(r'^([\d.,\s]+)\s+(.+)$', text)
+                code = match.group(2).strip() if match else text
+
+                specialties.append(Specialty(
+                    id=tab_id,
+                    code=code,
+                    name=text,
+                    full_name=None
+                ))
+                found_ids.add(tab_id)
+                found_names.add(text)
+
+    # Специальности из заголовков h2 (например, "Отделение первого курса")
+    for h2 in _H2(root):
+        text = _text(h2)
+        if "Расписание занятий для" not in text:
+            continue
+
+        specialty_name = text.replace("Расписание занятий для", "").strip()
+        if specialty_name in found_names:
+            continue
+
+        next_tabs = _first(_NEXT_NAV_TABS(h2))
+        if next_tabs is None:
+            continue
+        first_tab = _find(next_tabs, "li")
+        if first_tab is None:
+            continue
+        a_tag = _find(first_tab, "a")
+        if a_tag is None:
+            continue
+
+        tab_id = a_tag.get("href", "").replace("#", "")
+        if tab_id and tab_id not in found_ids:
+            specialties.append(Specialty(
+                id=tab_id,
+                code=specialty_name if specialty_name else "ОПК",
+                name=specialty_name,
+                full_name=None
+            ))
+            found_ids.add(tab_id)
+            found_names.add(specialty_name)
+
+    return specialties
+
+
+def parse_groups_for_specialty(root, specialty_tab_id: str) -> list[Group]:
+    """Парсит группы для конкретной специальности по ID таба"""
+    tab_content = _first(_DIV_BY_ID(root, id=specialty_tab_id))
+    if tab_content is None:
+        return []
+
+    return _parse_groups_in_tab(tab_content, specialty_tab_id)
+
+
+def parse_schedule_for_group(root, group_name: str, specialty_tab_id: str) -> Optional[WeekSchedule]:
+    """Парсит расписание для конкретной группы"""
+    tab_content = _first(_DIV_BY_ID(root, id=specialty_tab_id))
+    if tab_content is None:
+        return None
+
+    heading = f"Группа {group_name}"
+    group_pane = _index_group_panes(tab_content).get(heading)
+    if group_pane is None:
+        group_pane = _index_heading_parents(tab_content).get(heading)
+    if group_pane is None:
+        return None
+
+    return _parse_group_pane(group_pane, group_name, specialty_tab_id)
+
+
+def parse_specialty(root, specialty_tab_id: str) -> tuple[list[Group], dict[str, WeekSchedule]]:
+    """Парсит группы и расписания всех групп специальности за один проход по табу"""
+    tab_content = _first(_DIV_BY_ID(root, id=specialty_tab_id))
+    if tab_content is None:
+        return [], {}
+
+    groups = _parse_groups_in_tab(tab_content, specialty_tab_id)
+    panes = _index_group_panes(tab_content)
+    heading_parents = None
+
+    schedules = {}
+    for group in groups:
+        if group.name in schedules:
+            continue
+
+        heading = f"Группа {group.name}"
+        group_pane = panes.get(heading)
+        if group_pane is None:
+            if heading_parents is None:
+                heading_parents = _index_heading_parents(tab_content)
+            group_pane = heading_parents.get(heading)
+        if group_pane is None:
+            continue
+
+        schedules[group.name] = _parse_group_pane(group_pane, group.name, specialty_tab_id)
+
+    return groups, schedules
+
+
+def _parse_groups_in_tab(tab_content, specialty_tab_id: str) -> list[Group]:
+    """Собирает группы из div специальности"""
+    headings = []
+    for group_tab in _TAB_PANES(tab_content):
+        h3 = _find(group_tab, "h3")
+        if h3 is not None:
+            headings.append(_text(h3))
+
+    groups = _groups_from_headings(headings, specialty_tab_id)
+
+    # Если вложенных табов нет, ищем h3 напрямую
+    if not groups:
+        headings = [_text(h3) for h3 in tab_content.iterdescendants("h3")]
+        groups = _groups_from_headings(headings, specialty_tab_id)
+
+    return groups
+
+
+def _groups_from_headings(headings: list[str], specialty_tab_id: str) -> list[Group]:
+    groups = []
+    for text in headings:
+        if text.startswith("Группа "):
+            group_name = text.replace("Группа ", "").strip()
+            groups.append(Group(
+                id=group_name,
+                name=group_name,
+                specialty_id=specialty_tab_id
+            ))
+    return groups
+
+
+def _index_group_panes(tab_content) -> dict:
+    """Заголовок h3 -> первый tab-pane с таким заголовком"""
+    panes = {}
+    for group_tab in _TAB_PANES(tab_content):
+        h3 = _find(group_tab, "h3")
+        if h3 is not None:
+            panes.setdefault(_text(h3), group_tab)
+    return panes
+
+
+def _index_heading_parents(tab_content) -> dict:
+    """Заголовок h3 -> родительский контейнер первого такого h3"""
+    parents = {}
+    for h3 in tab_content.iterdescendants("h3"):
+        parents.setdefault(_text(h3), h3.getparent())
+    return parents
+
+
+def _parse_group_pane(group_pane, group_name: str, specialty_tab_id: str) -> WeekSchedule:
+    """Парсит недельное расписание из контейнера группы"""
+    days_schedule = []
+    for table in group_pane.iterdescendants("table"):
+        day_schedule = parse_day_table(table)
+        if day_schedule:
+            days_schedule.append(day_schedule)
+
+    # Добавляем выходные дни (те, которых нет в расписании)
+    existing_days = {d.day_index for d in days_schedule}
+    for i, day_name in enumerate(DAYS_NAMES):
+        if i not in existing_days:
+            days_schedule.append(DaySchedule(
+                day=day_name,
+                day_index=i,
+                campus=None,
+                lessons=[],
+                is_day_off=True
+            ))
+
+    # Сортировка устойчивая — порядок одинаковых дней как в parser.py
+    days_schedule.sort(key=lambda x: x.day_index)
+
+    return WeekSchedule(
+        group=group_name,
+        specialty_id=specialty_tab_id,
+        days=days_schedule
+    )
+
+
+def parse_day_table(table) -> Optional[DaySchedule]:
+    """Парсит таблицу расписания на один день"""
+    thead = _find(table, "thead")
+    if thead is None:
+        return None
+
+    h4 = _find(thead, "h4")
+    if h4 is None:
+        return None
+
+    header_text = _text(h4).upper()
+
+    day_name = None
+    campus = None
+    for day in DAYS_MAP.keys():
+        if day in header_text:
+            day_name = day
+            # Территория в span
+            span = _find(h4, "span")
+            if span is not None:
+                campus = _text(span) or None
+            break
+
+    if not day_name:
+        return None
+
+    lessons = []
+    for tbody in table.iterdescendants("tbody"):
+        for row in tbody.iterdescendants("tr"):
+            cells = list(row.iterdescendants("td"))
+            if len(cells) < 3:
+                continue
+
+            number_text = _text(cells[0])
+            if not number_text.isdigit():
+                continue
+            try:
+                number = int(number_text)
+            except ValueError:
+                continue
+
+            subject_cell = cells[1]
+            teacher_cell = cells[2]
+
+            numerator_div = _first(_LABEL_DANGER(subject_cell))
+            denominator_div = _first(_LABEL_INFO(subject_cell))
+
+            if numerator_div is not None or denominator_div is not None:
+                # Сдвоенная пара (числитель/знаменатель)
+                subject_num = _text(numerator_div) if numerator_div is not None else ""
+                subject_den = _text(denominator_div) if denominator_div is not None else ""
+
+                teacher_num_div = _first(_LABEL_DANGER(teacher_cell))
+                teacher_den_div = _first(_LABEL_INFO(teacher_cell))
+
+                if teacher_num_div is not None or teacher_den_div is not None:
+                    teacher_num = _text(teacher_num_div) if teacher_num_div is not None else ""
+                    teacher_den = _text(teacher_den_div) if teacher_den_div is not None else ""
+                else:
+                    # Один преподаватель на обе недели
+                    teacher_num = _text(teacher_cell)
+                    teacher_den = teacher_num
+
+                lesson = Lesson(
+                    number=number,
+                    subject=subject_num if subject_num else subject_den,
+                    teacher=teacher_num if teacher_num else teacher_den,
+                    subject_denominator=subject_den if subject_den and subject_den != subject_num else None,
+                    teacher_denominator=teacher_den if teacher_den and teacher_den != teacher_num else None
+                )
+            else:
+                lesson = Lesson(
+                    number=number,
+                    subject=_text(subject_cell),
+                    teacher=_text(teacher_cell)
+                )
+
+            if lesson.number > 0 and lesson.subject:
+                lessons.append(lesson)
+
+    return DaySchedule(
+        day=day_name,
+        day_index=DAYS_MAP.get(day_name, 0),
+        campus=campus,
+        lessons=lessons,
+        is_day_off=len(lessons) == 0
+    )
+
+
+# MARK: - Парсинг замен
+
+MONTHS_BY_NUMBER = {i + 1: month for i, month in enumerate(MONTHS)}
+
+
+def _next_element_sibling(element):
+    """Следующий соседний тег, комментарии пропускаются (как find_next_sibling)"""
+    for sibling in element.itersiblings():
+        if isinstance(sibling.tag, str):
+            return sibling
+    return None
+
+
+def parse_replacements(root) -> ReplacementsResponse:
+    """Парсит замены со страницы"""
+    days = []
+
+    for h4 in _H4(root):
+        text = _text(h4)
+
+        # Ищем заголовки вида "Замены на 28.11.2025 (Сегодня)"
+        if "Замены на" not in text:
+            continue
+
+        date_match = re.search(r'(\d{2}\.\d{2}\.\d{4})', text)
+        if not date_match:
+            continue
+
+        date_str = date_match.group(1)
+        is_today = "Сегодня" in text
+
+        try:
+            date_obj = datetime.strptime(date_str, "%d.%m.%Y")
+            date_display = f"{date_obj.day} {MONTHS_BY_NUMBER[date_obj.month]}"
+        except ValueError:
+            date_display = date_str
+
+        # Таблицы после заголовка до следующего h4 или hr
+        groups = []
+        current = _next_element_sibling(h4)
+        while current is not None:
+            if current.tag in ("h4", "hr"):
+                break
+
+            if current.tag == "div" and "table-responsive" in current.get("class", "").split():
+                table = _find(current, "table")
+                if table is not None:
+                    caption = _find(table, "caption")
+                    if caption is not None:
+                        group_name = _text(caption).replace("Группа:", "").strip()
+
+                        replacements = parse_replacement_table(table)
+                        if replacements:
+                            groups.append(GroupReplacements(
+                                group_name=group_name,
+                                replacements=replacements
+                            ))
+
+            current = _next_element_sibling(current)
+
+        if groups:
+            days.append(DayReplacements(
+                date=date_str,
+                date_display=date_display,
+                is_today=is_today,
+                groups=groups
+            ))
+
+    return ReplacementsResponse(days=days)
+
+
+def parse_replacement_table(table) -> list[Replacement]:
+    """Парсит таблицу замен для одной группы"""
+    replacements = []
+
+    rows = list(table.iterdescendants("tr"))
+    for row in rows[1:]:  # Пропускаем заголовок
+        cells = list(row.iterdescendants("td"))
+        if len(cells) < 4:
+            continue
+        try:
+            pair_number = int(_text(cells[0]))
+        except ValueError:
+            continue
+
+        replacements.append(Replacement(
+            pair_number=pair_number,
+            original_subject=_text(cells[1]),
+            new_subject=_text(cells[2]),
+            added_at=_text(cells[3])
+        ))
+
+    return replacements
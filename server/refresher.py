@@ -0,0 +1,180 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+from metrics import increment
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class Checked(Generic[T]):
+    """
+    Результат загрузчика, который знает время проверки источника сам
+    (например, снимок, опубликованный лидером): кеш берёт возраст и ошибку
+    отсюда, а не из момента, когда загрузчик вернул значение.
+    """
+    value: T
+    checked_at: float
+    last_error: Optional[str] = None
+
+
+class RefreshingCache(Generic[T]):
+    """
+    Кеш одного значения с single-flight обновлением и stale-while-revalidate.
+
+    - Пока возраст меньше soft_ttl, отдаётся кешированное значение.
+    - Между soft_ttl и hard_ttl отдаётся старое значение, а обновление
+      запускается в фоне.
+    - Если значения нет или оно старше hard_ttl, запрос ждёт обновления.
+      С serve_stale=True старше hard_ttl значение всё равно отдаётся сразу
+      (is_stale), ждут только запросы, для которых значения ещё нет.
+    - invalidate() только запускает обновление: пока оно идёт (или если
+      оно не удалось), запросы получают текущее значение.
+
+    Одновременно выполняется не больше одного обновления: все запросы,
+    пришедшие во время загрузки, ждут одну и ту же задачу.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Awaitable[T]],
+                 soft_ttl: float, hard_ttl: float, serve_stale: bool = False,
+                 on_change: Optional[Callable[[T], None]] = None):
+        self.name = name
+        self._on_change = on_change     # Вызывается, когда значение заменено другим объектом
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.serve_stale = serve_stale
+        self._loader = loader
+        self._value: Optional[T] = None
+        self._updated_at: Optional[float] = None
+        self._expired = False           # invalidate(): обновить, не дожидаясь soft_ttl
+        self._task: Optional[asyncio.Task] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def value(self) -> Optional[T]:
+        return self._value
+
+    @property
+    def updated_at(self) -> Optional[float]:
+        """Когда значение последний раз удачно проверено"""
+        return self._updated_at
+
+    @property
+    def age(self) -> Optional[float]:
+        """Возраст значения в секундах (None, если значения ещё нет)"""
+        if self._updated_at is None:
+            return None
+        return time.time() - self._updated_at
+
+    @property
+    def is_stale(self) -> bool:
+        """Отдаётся ли значение, которое не удалось вовремя обновить"""
+        age = self.age
+        return self._value is not None and (
+            self.last_error is not None or (age is not None and age > self.hard_ttl)
+        )
+
+    async def get(self) -> T:
+        """Возвращает значение, при необходимости обновляя его"""
+        age = self.age
+        if self._value is None or (age > self.hard_ttl and not self.serve_stale):
+            increment("cache.requests", labels={"cache": self.name, "result": "miss"})
+            return await self.refresh()
+        if self._expired or age > self.soft_ttl:
+            increment("cache.requests", labels={"cache": self.name, "result": "stale"})
+            self.refresh_in_background()
+        else:
+            increment("cache.requests", labels={"cache": self.name, "result": "hit"})
+        return self._value
+
+    async def refresh(self) -> T:
+        """Обновляет значение (или присоединяется к уже идущему обновлению)"""
+        task = self.refresh_in_background()
+        # shield: отменённый клиентский запрос не должен отменять общую загрузку
+        await asyncio.shield(task)
+        return self._value
+
+    def invalidate(self):
+        """
+        Помечает значение устаревшим и запускает обновление в фоне.
+
+        Запросы не ждут mpt.ru: до удачного обновления они получают
+        текущее значение, как после истечения soft_ttl.
+        """
+        self._expired = True
+        if self._value is not None:
+            self.refresh_in_background()
+
+    def seed(self, value: T, updated_at: Optional[float] = None, last_error: Optional[str] = None):
+        """
+        Кладёт значение, полученное не через loader (например, с диска после рестарта).
+
+        updated_at — когда значение было последний раз проверено (по умолчанию сейчас),
+        last_error — ошибка последней проверки.
+        """
+        self._set(value, updated_at if updated_at is not None else time.time())
+        self.last_error = last_error
+
+    def refresh_in_background(self) -> asyncio.Task:
+        """Запускает обновление, если оно ещё не идёт, и возвращает его задачу"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            self._task.add_done_callback(self._on_done)
+        return self._task
+
+    async def _run(self):
+        started_at = time.time()
+        try:
+            value = await self._loader()
+        except Exception as e:
+            self.last_error = str(e) or type(e).__name__
+            raise
+        if isinstance(value, Checked):
+            self._set(value.value, value.checked_at)
+            self.last_error = value.last_error
+            return
+        self._set(value, started_at)
+        self.last_error = None
+
+    def _set(self, value: T, updated_at: float):
+        changed = value is not self._value
+        self._value = value
+        self._updated_at = updated_at
+        self._expired = False
+        if changed and self._on_change is not None:
+            self._on_change(value)
+
+    def to_dict(self) -> dict:
+        age = self.age
+        return {
+            "age_seconds": round(age, 3) if age is not None else None,
+            "stale": self.is_stale,
+            "last_error": self.last_error
+        }
+
+    def _on_done(self, task: asyncio.Task):
+        # Ошибку фонового обновления никто не ждёт — логируем и продолжаем
+        # отдавать предыдущее значение
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Ошибка обновления кеша {self.name}: {task.exception()}")
+
+
+async def refresh_periodically(cache: RefreshingCache, interval: float, jitter: float):
+    """
+    Фоновое обновление кеша раз в interval секунд (± jitter, доля интервала).
+
+    Запросы не ждут mpt.ru: к их приходу снимок уже обновлён, а при ошибке
+    кеш продолжает отдавать последний удачный снимок.
+    """
+    while True:
+        await asyncio.sleep(max(0.0, interval * (1 + random.uniform(-jitter, jitter))))
+        try:
+            await cache.refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # Уже залогировано в RefreshingCache._on_done
@@ -0,0 +1,303 @@
+import hashlib
+import time
+from typing import Any, Callable, Optional
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from models import (
+    WeekInfo, WeekType, Specialty, Group, WeekSchedule, ReplacementsResponse,
+    DayReplacements, GroupReplacements, TeacherLesson
+)
+from metrics import timed
+import parser
+import parser_lxml
+import config
+
+
+# Реализации парсера: обе возвращают одинаковые модели из models.py
+PARSER_BACKENDS = {
+    "bs4": parser,
+    "lxml": parser_lxml
+}
+
+
+def get_parser_backend(name: Optional[str] = None):
+    """Модуль парсера по имени (по умолчанию — из MPT_PARSER_BACKEND)"""
+    name = name or config.PARSER_BACKEND
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Неизвестный MPT_PARSER_BACKEND: {name}")
+    return PARSER_BACKENDS[name]
+
+
+class SnapshotBase(BaseModel):
+    """Общая часть снимков: неизменяемые данные + память производных данных"""
+    model_config = ConfigDict(frozen=True)
+
+    # Монотонная версия снимка (мс, см. next_version); 0 — снимок сохранён до появления версий
+    version: int = 0
+
+    # Производные данные (индексы, хеши), живут вместе со снимком;
+    # готовые тела ответов и их фрагменты хранятся в ResponseCache с ограничением по памяти
+    _bodies: dict = PrivateAttr(default_factory=dict)
+
+    def memo(self, key: str, build: Callable[[], Any]) -> Any:
+        """Возвращает значение по ключу, вычисляя его один раз на снимок"""
+        value = self._bodies.get(key)
+        if value is None:
+            value = self._bodies[key] = build()
+        return value
+
+
+class ScheduleSnapshot(SnapshotBase):
+    """
+    Неизменяемый индекс расписания, построенный за один проход по странице.
+
+    Все read-эндпоинты отвечают словарными выборками из него,
+    дерево страницы после построения больше не нужно.
+    """
+
+    week_info: WeekInfo
+    specialties: list[Specialty]
+    groups: dict[str, list[Group]]                   # specialty_id -> группы
+    schedules: dict[str, dict[str, WeekSchedule]]    # specialty_id -> группа -> расписание
+    teachers: dict[str, list[TeacherLesson]] = {}    # преподаватель -> его пары за неделю
+    fetched_at: float                                # Когда загружена страница
+    content_hash: str = ""                           # sha256 HTML, из которого построен индекс
+
+    def get_groups(self, specialty_id: str) -> list[Group]:
+        """Группы специальности (пустой список, если специальность неизвестна)"""
+        return self.groups.get(specialty_id, [])
+
+    def get_schedule(self, group_name: str, specialty_id: str) -> Optional[WeekSchedule]:
+        """Расписание группы или None"""
+        return self.schedules.get(specialty_id, {}).get(group_name)
+
+    def find_teacher(self, name: str) -> Optional[str]:
+        """Имя преподавателя в индексе (без учёта регистра и лишних пробелов) или None"""
+        if name in self.teachers:
+            return name
+        normalized = self.memo("teachers:normalized", lambda: {
+            _normalize_teacher(teacher): teacher for teacher in self.teachers
+        })
+        return normalized.get(_normalize_teacher(name))
+
+
+    def group_hashes(self) -> dict[tuple[str, str], str]:
+        """Хеш расписания каждой группы: (specialty_id, группа) -> хеш"""
+        return self.memo("sync:groups", lambda: {
+            (specialty_id, group_name): _digest(schedule.model_dump_json())
+            for specialty_id, group_schedules in self.schedules.items()
+            for group_name, schedule in group_schedules.items()
+        })
+
+    def specialties_hash(self) -> str:
+        """Хеш списка специальностей и их групп"""
+        return self.memo("sync:specialties", lambda: _digest(
+            "".join(spec.model_dump_json() for spec in self.specialties) +
+            "".join(group.model_dump_json() for groups in self.groups.values() for group in groups)
+        ))
+
+
+class ReplacementsSnapshot(SnapshotBase):
+    """Разобранная страница замен"""
+
+    replacements: ReplacementsResponse
+    fetched_at: float
+    content_hash: str = ""
+
+    def group_hashes(self) -> dict[str, str]:
+        """Хеш замен каждой группы (по всем дням): группа -> хеш"""
+        def build():
+            parts: dict[str, list[str]] = {}
+            for day in self.replacements.days:
+                for group in day.groups:
+                    parts.setdefault(group.group_name, []).append(day.date + group.model_dump_json())
+            return {name: _digest("".join(items)) for name, items in parts.items()}
+        return self.memo("sync:replacements", build)
+
+    def group_index(self) -> dict[str, list[tuple[int, int]]]:
+        """
+        Токен группы -> [(номер дня, номер таблицы)] в порядке страницы.
+
+        Составные названия ("Э-1-22, Э-11/1-23") разбиты на группы, поэтому
+        поиск точный: "Э-1-2" не находит замены "Э-1-22".
+        """
+        def build():
+            index: dict[str, list[tuple[int, int]]] = {}
+            for day_pos, day in enumerate(self.replacements.days):
+                for group_pos, group in enumerate(day.groups):
+                    for token in parser.group_tokens(group.group_name):
+                        index.setdefault(token, []).append((day_pos, group_pos))
+            return index
+        return self.memo("replacements:index", build)
+
+    def group_tables(self, group_name: str) -> list[tuple[int, int]]:
+        """Позиции таблиц замен группы (по всем группам составного названия)"""
+        index = self.group_index()
+        positions = set()
+        for token in parser.group_tokens(group_name):
+            positions.update(index.get(token, ()))
+        return sorted(positions)
+
+    def for_group(self, group_name: str) -> ReplacementsResponse:
+        """Замены только для группы (тот же формат, что у всей страницы)"""
+        days: list[DayReplacements] = []
+        groups_by_day: dict[int, list[GroupReplacements]] = {}
+        for day_pos, group_pos in self.group_tables(group_name):
+            groups_by_day.setdefault(day_pos, []).append(self.replacements.days[day_pos].groups[group_pos])
+        for day_pos, groups in groups_by_day.items():
+            day = self.replacements.days[day_pos]
+            days.append(DayReplacements(
+                date=day.date,
+                date_display=day.date_display,
+                is_today=day.is_today,
+                groups=groups
+            ))
+        return ReplacementsResponse(days=days)
+
+
+def next_version(previous: Optional[SnapshotBase]) -> int:
+    """
+    Версия нового снимка: текущее время в мс, но строго больше предыдущей.
+    
+    Версии расписания и замен растут в одной шкале и переживают рестарт
+    (версия сохраняется вместе со снимком).
+    """
+    version = int(time.time() * 1000)
+    if previous is not None and previous.version >= version:
+        version = previous.version + 1
+    return version
+
+
+def _digest(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def _normalize_teacher(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+def _split_teachers(teacher: Optional[str]) -> list[str]:
+    """Разделяет строку преподавателей по запятым (как в /api/teachers)"""
+    if not teacher:
+        return []
+    names = []
+    for part in teacher.split(","):
+        name = part.strip()
+        if name and len(name) > 2:
+            names.append(name)
+    return names
+
+
+def build_teacher_index(schedules: dict[str, dict[str, WeekSchedule]]) -> dict[str, list[TeacherLesson]]:
+    """
+    Инвертированный индекс: преподаватель -> [(группа, день, пара, предмет, неделя)].
+
+    Пара по числителю — (subject, teacher), по знаменателю —
+    (subject_denominator или subject, teacher_denominator или teacher).
+    Если у преподавателя в обе недели одна и та же пара, week_type = None.
+    """
+    index: dict[str, list[TeacherLesson]] = {}
+
+    for specialty_id, group_schedules in schedules.items():
+        for group_name, schedule in group_schedules.items():
+            for day in schedule.days:
+                for lesson in day.lessons:
+                    numerator = (lesson.subject, _split_teachers(lesson.teacher))
+                    denominator = (
+                        lesson.subject_denominator or lesson.subject,
+                        _split_teachers(lesson.teacher_denominator or lesson.teacher)
+                    )
+
+                    entries = []
+                    for teacher in numerator[1]:
+                        if denominator[0] == numerator[0] and teacher in denominator[1]:
+                            entries.append((teacher, numerator[0], None))
+                        else:
+                            entries.append((teacher, numerator[0], WeekType.NUMERATOR))
+                    for teacher in denominator[1]:
+                        if denominator[0] != numerator[0] or teacher not in numerator[1]:
+                            entries.append((teacher, denominator[0], WeekType.DENOMINATOR))
+
+                    for teacher, subject, week_type in entries:
+                        index.setdefault(teacher, []).append(TeacherLesson(
+                            number=lesson.number,
+                            subject=subject,
+                            group=group_name,
+                            specialty_id=specialty_id,
+                            day=day.day,
+                            day_index=day.day_index,
+                            campus=day.campus,
+                            week_type=week_type
+                        ))
+
+    for lessons in index.values():
+        lessons.sort(key=lambda x: (x.day_index, x.number, x.group))
+
+    return dict(sorted(index.items()))
+
+
+def _call(backend, function: str, *args):
+    """backend.<function>(*args) с замером времени (mpt_parse_function_seconds)"""
+    with timed("parse.function", {"function": function, "backend": backend.__name__}):
+        return getattr(backend, function)(*args)
+
+
+def build_schedule_snapshot(document, fetched_at: Optional[float] = None, backend=parser,
+                            content_hash: str = "", version: int = 0) -> ScheduleSnapshot:
+    """
+    Строит индекс специальность -> группа -> расписание по всей странице.
+
+    document — дерево, построенное backend.parse_document().
+    """
+    specialties = _call(backend, "parse_specialties", document)
+
+    groups = {}
+    schedules = {}
+    for spec in specialties:
+        groups[spec.id], schedules[spec.id] = _call(backend, "parse_specialty", document, spec.id)
+
+    with timed("parse.function", {"function": "build_teacher_index", "backend": backend.__name__}):
+        teachers = build_teacher_index(schedules)
+
+    return ScheduleSnapshot(
+        week_info=_call(backend, "parse_week_info", document),
+        specialties=specialties,
+        groups=groups,
+        schedules=schedules,
+        teachers=teachers,
+        fetched_at=fetched_at if fetched_at is not None else time.time(),
+        content_hash=content_hash,
+        version=version
+    )
+
+
+def parse_schedule_page(html: str, fetched_at: Optional[float] = None,
+                        backend_name: Optional[str] = None, content_hash: str = "",
+                        version: int = 0) -> ScheduleSnapshot:
+    """Разбирает HTML страницы расписания в индекс (выполняется в пуле парсинга)"""
+    backend = get_parser_backend(backend_name)
+    return build_schedule_snapshot(
+        _call(backend, "parse_document", html), fetched_at=fetched_at, backend=backend,
+        content_hash=content_hash, version=version
+    )
+
+
+def parse_replacements_page(html: str, backend_name: Optional[str] = None) -> ReplacementsResponse:
+    """Разбирает HTML страницы замен (выполняется в пуле парсинга)"""
+    backend = get_parser_backend(backend_name)
+    return _call(backend, "parse_replacements", _call(backend, "parse_document", html))
+
+
+def build_replacements_snapshot(html: str, fetched_at: Optional[float] = None,
+                                backend_name: Optional[str] = None,
+                                content_hash: str = "", version: int = 0) -> ReplacementsSnapshot:
+    """Разбирает HTML страницы замен в снимок (выполняется в пуле парсинга)"""
+    snapshot = ReplacementsSnapshot(
+        replacements=parse_replacements_page(html, backend_name),
+        fetched_at=fetched_at if fetched_at is not None else time.time(),
+        content_hash=content_hash,
+        version=version
+    )
+    # Индекс групп строится сразу, вместе с разбором
+    snapshot.group_index()
+    return snapshot
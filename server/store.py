@@ -0,0 +1,205 @@
+import os
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Generic, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессной блокировки нет, процесс всегда лидер
+    fcntl = None
+
+
+T = TypeVar("T", bound=BaseModel)
+
+
+@dataclass
+class SnapshotStatus:
+    """Версия снимка и результат последней проверки mpt.ru лидером"""
+    version: int
+    checked_at: float               # Последняя удачная проверка страницы (снимок актуален на этот момент)
+    last_error: Optional[str]       # Ошибка последней проверки (None — удачна)
+
+
+@dataclass
+class StoredSnapshot(Generic[T]):
+    """Снимок из хранилища вместе с его версией и временем проверки"""
+    version: int
+    snapshot: T
+    checked_at: float
+    last_error: Optional[str] = None
+
+
+class SnapshotStore:
+    """
+    Хранит последние разобранные снимки в SQLite.
+
+    После рестарта сервер поднимает снимки отсюда за миллисекунды и сразу
+    отвечает на запросы, а свежие данные с mpt.ru подтягивает в фоне.
+    Снимок хранится как JSON модели, сжатый zlib.
+
+    Файл общий для всех uvicorn-воркеров: лидер публикует сюда снимки,
+    увеличивая version, остальные воркеры читают опубликованное. Лидер
+    также записывает время и ошибку каждой проверки mpt.ru (mark_checked),
+    поэтому возраст данных одинаков на всех воркерах и после рестарта.
+    Здесь же выдаются версии данных для /api/changes (sync_version).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    kind TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    content_hash TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    saved_at REAL NOT NULL,
+                    payload BLOB NOT NULL,
+                    checked_at REAL,
+                    last_error TEXT
+                )
+            """)
+            columns = {row[1] for row in db.execute("PRAGMA table_info(snapshots)")}
+            if "version" not in columns:
+                db.execute("ALTER TABLE snapshots ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            if "checked_at" not in columns:
+                db.execute("ALTER TABLE snapshots ADD COLUMN checked_at REAL")
+                db.execute("ALTER TABLE snapshots ADD COLUMN last_error TEXT")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS sync_versions (
+                    schedule_version INTEGER NOT NULL,
+                    replacements_version INTEGER NOT NULL,
+                    version INTEGER NOT NULL UNIQUE,
+                    PRIMARY KEY (schedule_version, replacements_version)
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def save(self, kind: str, snapshot: BaseModel) -> int:
+        """Сохраняет снимок вида kind ("schedule", "replacements") и возвращает его версию"""
+        payload = zlib.compress(snapshot.model_dump_json().encode("utf-8"), 6)
+        with self._connect() as db:
+            row = db.execute("SELECT version FROM snapshots WHERE kind = ?", (kind,)).fetchone()
+            version = (row[0] if row else 0) + 1
+            db.execute(
+                "INSERT OR REPLACE INTO snapshots "
+                "(kind, version, content_hash, fetched_at, saved_at, payload, checked_at, last_error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, NULL)",
+                (kind, version, snapshot.content_hash, snapshot.fetched_at, time.time(), payload, snapshot.fetched_at)
+            )
+        return version
+
+    def sync_version(self, schedule_version: int, replacements_version: int) -> int:
+        """
+        Версия данных для пары снимков: выдаётся при первом обращении любого воркера
+        (время в мс, но строго больше всех выданных), дальше возвращается та же.
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT version FROM sync_versions WHERE schedule_version = ? AND replacements_version = ?",
+                (schedule_version, replacements_version)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            last = db.execute("SELECT MAX(version) FROM sync_versions").fetchone()[0] or 0
+            version = max(last + 1, int(time.time() * 1000))
+            db.execute(
+                "INSERT INTO sync_versions (schedule_version, replacements_version, version) VALUES (?, ?, ?)",
+                (schedule_version, replacements_version, version)
+            )
+            # Старые пары не нужны: история /api/changes всё равно ограничена
+            db.execute(
+                "DELETE FROM sync_versions WHERE version < "
+                "(SELECT MIN(version) FROM (SELECT version FROM sync_versions ORDER BY version DESC LIMIT 1000))"
+            )
+        return version
+
+    def mark_checked(self, kind: str, checked_at: Optional[float], last_error: Optional[str] = None):
+        """
+        Результат проверки mpt.ru, после которой снимок не изменился.
+
+        checked_at — время удачной проверки (None при ошибке: снимок остаётся
+        актуальным на время прошлой удачной проверки), last_error — ошибка.
+        """
+        with self._connect() as db:
+            db.execute(
+                "UPDATE snapshots SET checked_at = COALESCE(?, checked_at, fetched_at), last_error = ? WHERE kind = ?",
+                (checked_at, last_error, kind)
+            )
+
+    def status(self, kind: str) -> Optional[SnapshotStatus]:
+        """Версия и результат последней проверки снимка вида kind (без чтения данных)"""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT version, COALESCE(checked_at, fetched_at), last_error FROM snapshots WHERE kind = ?",
+                (kind,)
+            ).fetchone()
+        return SnapshotStatus(*row) if row else None
+
+    def load(self, kind: str, model: Type[T]) -> Optional[StoredSnapshot[T]]:
+        """Загружает последний снимок вида kind или None"""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT version, payload, COALESCE(checked_at, fetched_at), last_error FROM snapshots WHERE kind = ?",
+                (kind,)
+            ).fetchone()
+        if row is None:
+            return None
+        return StoredSnapshot(
+            version=row[0], snapshot=model.model_validate_json(zlib.decompress(row[1])),
+            checked_at=row[2], last_error=row[3]
+        )
+
+
+class LeaderLock:
+    """
+    Выбор лидера среди процессов через flock на файле.
+
+    Лидер (ровно один процесс) загружает и разбирает страницы mpt.ru,
+    остальные только читают опубликованные снимки. Блокировка снимается
+    операционной системой, если процесс лидера завершился, и её забирает
+    следующий воркер.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """Пытается стать лидером, не блокируясь"""
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None and self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+from typing import AsyncIterator, Optional
+
+from http_cache import PreparedBody, ResponseCache, encode_json
+from parser import group_tokens
+from refresher import RefreshingCache
+from snapshot import ReplacementsSnapshot
+
+
+class Subscriber:
+    """
+    Одно SSE-подключение.
+
+    Память на подключение постоянная: список групп, множество групп с
+    непрочитанными изменениями и Event. Сами данные подключение не хранит —
+    при пробуждении оно берёт готовые байты из текущего снимка.
+    """
+
+    __slots__ = ("groups", "changed", "wakeup")
+
+    def __init__(self, groups: list[str]):
+        self.groups = groups
+        self.changed = set(groups)          # При подключении отправляем текущее состояние
+        self.wakeup = asyncio.Event()
+        self.wakeup.set()
+
+    def notify(self, group: str):
+        self.changed.add(group)
+        self.wakeup.set()
+
+
+class ReplacementsHub:
+    """
+    Рассылка изменений замен подписчикам (Server-Sent Events).
+
+    Пока есть подписчики, одна фоновая задача раз в poll_interval берёт
+    снимок из кеша (кеш сам обновляет страницу по своему TTL). Для нового
+    снимка хеш замен считается один раз на группу, и будятся только
+    подписчики групп, у которых замены действительно изменились. Готовые
+    события лежат в общем кеше ответов (responses) под видом "replacements".
+    """
+
+    def __init__(self, cache: RefreshingCache[ReplacementsSnapshot], responses: ResponseCache,
+                 poll_interval: float, ping_interval: float, max_subscribers: int):
+        self.cache = cache
+        self.responses = responses
+        self.poll_interval = poll_interval
+        self.ping_interval = ping_interval
+        self.max_subscribers = max_subscribers
+        self._subscribers: dict[str, set[Subscriber]] = {}   # группа -> подписчики
+        self._count = 0
+        self._digests: dict[str, str] = {}                   # группа -> хеш последних замен
+        self._snapshot: Optional[ReplacementsSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def canonical_group(name: str) -> str:
+        """Одно написание для всех вариантов названия: "э-1-22 ,Э-11/1-23" -> "Э-1-22, Э-11/1-23" """
+        return ", ".join(group_tokens(name))
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._count
+
+    @property
+    def is_full(self) -> bool:
+        return self._count >= self.max_subscribers
+
+    def subscribe(self, groups: list[str]) -> Subscriber:
+        subscriber = Subscriber(groups)
+        for group in groups:
+            self._subscribers.setdefault(group, set()).add(subscriber)
+            # Новая группа: запоминаем её текущие замены, чтобы не пропустить следующее изменение
+            if group not in self._digests and self._snapshot is not None:
+                self._digests[group] = self._digest(self._snapshot, group)
+        self._count += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        for group in subscriber.groups:
+            subscribers = self._subscribers.get(group)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[group]
+                    self._digests.pop(group, None)
+        self._count -= 1
+
+    def event(self, snapshot: ReplacementsSnapshot, group: str) -> bytes:
+        """Готовое SSE-событие с заменами группы (одно на снимок и группу)"""
+        return self.responses.get_or_build(
+            ("replacements", "sse", group, snapshot.version),
+            lambda: PreparedBody(
+                b"event: replacements\nid: " + str(snapshot.version).encode() + b"\ndata: " +
+                encode_json({"group": group, "replacements": snapshot.for_group(group)}) + b"\n\n",
+                f'"sse-{snapshot.version}"'
+            )
+        ).body
+
+    def _digest(self, snapshot: ReplacementsSnapshot, group: str) -> str:
+        """Хеш данных события (без id, который меняется с каждым снимком)"""
+        return hashlib.sha256(self.event(snapshot, group).split(b"\ndata: ", 1)[1]).hexdigest()
+
+    def publish(self, snapshot: ReplacementsSnapshot):
+        """Будит подписчиков групп, замены которых изменились в snapshot"""
+        self._snapshot = snapshot
+        for group, subscribers in list(self._subscribers.items()):
+            digest = self._digest(snapshot, group)
+            previous = self._digests.get(group)
+            self._digests[group] = digest
+            if previous is not None and previous != digest:
+                for subscriber in subscribers:
+                    subscriber.notify(group)
+
+    async def _run(self):
+        while self._count > 0:
+            try:
+                snapshot = await self.cache.get()
+                if snapshot is not self._snapshot:
+                    self.publish(snapshot)
+            except Exception as e:
+                print(f"Ошибка обновления замен для подписчиков: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def stream(self, groups: list[str]) -> AsyncIterator[bytes]:
+        """Поток SSE для подписчика: текущие замены, затем только изменения"""
+        # Подписка внутри генератора: отписка в finally выполнится при любом разрыве
+        subscriber = self.subscribe(groups)
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), self.ping_interval)
+                except asyncio.TimeoutError:
+                    # Комментарий держит соединение открытым через прокси
+                    yield b": ping\n\n"
+                    continue
+
+                subscriber.wakeup.clear()
+                snapshot = self._snapshot or await self.cache.get()
+                if self._snapshot is None:
+                    self.publish(snapshot)
+                changed, subscriber.changed = subscriber.changed, set()
+                for group in subscriber.groups:
+                    if group in changed:
+                        yield self.event(snapshot, group)
+        finally:
+            self.unsubscribe(subscriber)
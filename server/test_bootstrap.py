@@ -0,0 +1,115 @@
+"""
+/api/bootstrap отдаёт то же, что отдельные эндпоинты, и их ETag;
+его версия годится для /api/changes?since=.
+
+Запуск: python -m pytest -q test_bootstrap.py
+"""
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+import main
+from changes import ChangeLog
+from snapshot import parse_schedule_page, build_replacements_snapshot
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+GROUP = "Э-1-22, Э-11/1-23"
+
+
+def _request(path: str, params: dict = None, headers: dict = None) -> httpx.Response:
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, params=params, headers=headers)
+    return asyncio.run(send())
+
+
+@pytest.fixture(scope="module")
+def specialty_id():
+    schedule = parse_schedule_page((FIXTURES / "schedule.html").read_text(encoding="utf-8"), version=1)
+    replacements = build_replacements_snapshot(
+        (FIXTURES / "replacements.html").read_text(encoding="utf-8"), version=2
+    )
+    main.schedule_cache.seed(schedule)
+    main.replacements_cache.seed(replacements)
+    return next(spec_id for spec_id, groups in schedule.schedules.items() if GROUP in groups)
+
+
+def test_bootstrap_matches_endpoints(specialty_id):
+    response = _request("/api/bootstrap", {"group": GROUP, "specialty_id": specialty_id})
+    assert response.status_code == 200
+    bootstrap = response.json()
+    assert bootstrap["version"] == main.change_log.current(
+        main.schedule_cache.value, main.replacements_cache.value
+    ).version
+
+    endpoints = {
+        "week_info": ("/api/week-info", {}),
+        "specialties": ("/api/specialties", {}),
+        "groups": ("/api/groups", {"specialty_id": specialty_id}),
+        "schedule": ("/api/schedule", {"group": GROUP, "specialty_id": specialty_id}),
+        "replacements": ("/api/replacements", {"group": GROUP}),
+    }
+    for name, (path, params) in endpoints.items():
+        expected = _request(path, params)
+        body = expected.json()
+        assert bootstrap[name] == (body["schedule"] if name == "schedule" else body), name
+
+        # ETag из bootstrap сразу даёт 304 на отдельном эндпоинте
+        revalidated = _request(path, params, {"If-None-Match": bootstrap["etags"][name]})
+        assert revalidated.status_code == 304, name
+
+    content = _request("/api/content/version").json()
+    assert bootstrap["content"] == content
+    assert _request("/api/content/bundle", headers={"If-None-Match": bootstrap["etags"]["content"]}).status_code == 304
+
+
+def test_bootstrap_is_conditional(specialty_id):
+    response = _request("/api/bootstrap", {"group": GROUP, "specialty_id": specialty_id}, {"Accept-Encoding": "br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert json.loads(response.content)["schedule"]["group"] == GROUP
+
+    revalidated = _request("/api/bootstrap", {"group": GROUP, "specialty_id": specialty_id},
+                           {"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_bootstrap_unknown_group(specialty_id):
+    response = _request("/api/bootstrap", {"group": "Несуществующая-1-00", "specialty_id": specialty_id})
+    assert response.status_code == 404
+
+
+def test_bootstrap_version_is_known_to_changes(specialty_id, monkeypatch):
+    monkeypatch.setattr(main, "change_log", ChangeLog(limit=10))
+    main.response_cache.invalidate("replacements")
+    version = _request("/api/bootstrap", {"group": GROUP, "specialty_id": specialty_id}).json()["version"]
+
+    previous = main.replacements_cache.value
+    html = (FIXTURES / "replacements.html").read_text(encoding="utf-8")
+    main.replacements_cache.seed(build_replacements_snapshot(html.replace("<b>Э-2-22</b>", "<b>Э-3-22</b>"), version=3))
+    try:
+        changes = _request("/api/changes", {"since": version}).json()
+    finally:
+        main.replacements_cache.seed(previous)
+    assert not changes["full_resync"]
+    assert changes["replacements"] == {"changed": ["Э-3-22"], "removed": ["Э-2-22"]}
+
+
+def test_new_schedule_drops_entries_of_both_snapshots(specialty_id):
+    _request("/api/bootstrap", {"group": GROUP, "specialty_id": specialty_id})
+    _request("/api/effective-schedule", {"group": GROUP, "specialty_id": specialty_id})
+
+    def combined():
+        return [key for key in main.response_cache._entries if isinstance(key[0], tuple)]
+
+    assert len(combined()) == 2
+    previous = main.schedule_cache.value
+    main.schedule_cache.seed(previous.model_copy(update={"version": previous.version + 10}))
+    try:
+        assert combined() == []
+    finally:
+        main.schedule_cache.seed(previous)
@@ -0,0 +1,152 @@
+"""
+Журнал версий для /api/changes: что изменилось с версии since.
+
+Запуск: python -m pytest -q test_changes.py
+"""
+from pathlib import Path
+
+import pytest
+
+import main
+from changes import ChangeLog
+from snapshot import parse_schedule_page, build_replacements_snapshot
+from store import SnapshotStore
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _schedule(version: int, **replace):
+    html = (FIXTURES / "schedule.html").read_text(encoding="utf-8")
+    for old, new in replace.items():
+        html = html.replace(old, new)
+    return parse_schedule_page(html, version=version)
+
+
+def _replacements(version: int, **replace):
+    html = (FIXTURES / "replacements.html").read_text(encoding="utf-8")
+    for old, new in replace.items():
+        html = html.replace(old, new)
+    return build_replacements_snapshot(html, version=version)
+
+
+def _removed_groups(changes: dict) -> list[str]:
+    return [item["group"] for item in changes["groups"]["removed"]]
+
+
+@pytest.fixture(scope="module")
+def replacements():
+    return _replacements(2)
+
+
+def test_changed_and_removed_groups(replacements):
+    log = ChangeLog(limit=10)
+    before = log.current(_schedule(1), replacements)
+    # Другой предмет у Э-1-22, а группа Э-2-22 переименована в Э-3-22
+    after = log.current(_schedule(3, **{"Элементы высшей математики": "Теория вероятностей", "Э-2-22": "Э-3-22"}),
+                        replacements)
+
+    changes = log.changes(before.version, after)
+    assert changes["version"] == after.version > before.version
+    assert not changes["full_resync"]
+    assert not changes["week_info_changed"]
+    changed = {item["group"] for item in changes["groups"]["changed"]}
+    assert changed == {"Э-1-22, Э-11/1-23", "Э-3-22"}
+    assert _removed_groups(changes) == ["Э-2-22"]
+    assert changes["replacements"] == {"changed": [], "removed": []}
+
+
+def test_unknown_since(replacements):
+    log = ChangeLog(limit=1)
+    first = log.current(_schedule(1), replacements)
+    current = log.current(_schedule(3), replacements)
+    # Версия вытеснена из истории — и версия, которой не было вовсе
+    assert log.changes(first.version, current) == {"version": current.version, "full_resync": True}
+    assert log.changes(12345, current) == {"version": current.version, "full_resync": True}
+    assert not log.changes(current.version, current)["full_resync"]
+
+
+def test_published_versions_are_recorded(replacements, monkeypatch):
+    monkeypatch.setattr(main, "change_log", ChangeLog(limit=10))
+    previous = main.schedule_cache.value, main.replacements_cache.value
+    try:
+        # Публикация снимков (как у лидера или последователя), без запросов к /api/changes
+        main.schedule_cache.seed(_schedule(1))
+        main.replacements_cache.seed(replacements)
+        since = main.change_log.current(main.schedule_cache.value, main.replacements_cache.value).version
+        main.schedule_cache.seed(_schedule(3, **{"Э-2-22": "Э-3-22"}))
+        current = main.change_log.current(main.schedule_cache.value, main.replacements_cache.value)
+        changes = main.change_log.changes(since, current)
+    finally:
+        for cache, value in zip((main.schedule_cache, main.replacements_cache), previous):
+            if value is not None:
+                cache.seed(value)
+    assert not changes["full_resync"]
+    assert _removed_groups(changes) == ["Э-2-22"]
+
+
+# Расписание получает версию раньше замен (его разбор дольше), а публикуется позже:
+# версия расписания меньше версии замен
+SCHEDULES = {0: (10, {}), 1: (20, {"Э-2-22": "Э-3-22"})}
+REPLACEMENTS = {0: (15, {}), 1: (25, {"<b>Ю-1-23</b>": "<b>Ю-9-23</b>"})}
+
+
+def _publish(log: ChangeLog, order: list[str]):
+    """Публикует снимки в заданном порядке, как on_snapshot_change: состояние на каждую публикацию"""
+    build = {"schedule": (_schedule, SCHEDULES), "replacements": (_replacements, REPLACEMENTS)}
+    published = {"schedule": 0, "replacements": 0}
+
+    def snapshot(kind):
+        factory, versions = build[kind]
+        version, replace = versions[published[kind]]
+        return factory(version, **replace)
+
+    current = {kind: snapshot(kind) for kind in build}
+    states = [log.current(current["schedule"], current["replacements"])]
+    for kind in order:
+        published[kind] += 1
+        current[kind] = snapshot(kind)
+        states.append(log.current(current["schedule"], current["replacements"]))
+    return states
+
+
+@pytest.mark.parametrize("order", [["schedule", "replacements"], ["replacements", "schedule"]])
+def test_publication_order(order):
+    log = ChangeLog(limit=10)
+    first, middle, last = _publish(log, order)
+    assert first.version < middle.version < last.version
+
+    changes = log.changes(first.version, last)
+    assert not changes["full_resync"]
+    assert _removed_groups(changes) == ["Э-2-22"]
+    assert changes["replacements"]["removed"] == ["Ю-1-23"]
+
+    # С промежуточной версии видно только то, что опубликовано после неё
+    changes = log.changes(middle.version, last)
+    if order[0] == "schedule":
+        assert _removed_groups(changes) == [] and changes["replacements"]["removed"] == ["Ю-1-23"]
+    else:
+        assert _removed_groups(changes) == ["Э-2-22"] and changes["replacements"]["removed"] == []
+
+
+def test_workers_share_versions(tmp_path):
+    """Лидер публикует замены, потом расписание; последователь получил оба снимка за один опрос"""
+    store = SnapshotStore(str(tmp_path / "snapshots.db"))
+    leader = ChangeLog(limit=10, allocate=store.sync_version)
+    follower = ChangeLog(limit=10, allocate=store.sync_version)
+
+    leader_states = _publish(leader, ["replacements", "schedule"])
+    # follow_leader кладёт сначала расписание, потом замены
+    follower_states = _publish(follower, ["schedule", "replacements"])
+    assert leader_states[0].version == follower_states[0].version
+    assert leader_states[-1].version == follower_states[-1].version
+    # Пары, которые видел только один воркер, получили разные версии
+    assert leader_states[1].version != follower_states[1].version
+
+    since = leader_states[0].version
+    for log, current in ((leader, leader_states[-1]), (follower, follower_states[-1])):
+        changes = log.changes(since, current)
+        assert _removed_groups(changes) == ["Э-2-22"]
+        assert changes["replacements"]["removed"] == ["Ю-1-23"]
+    # Промежуточной пары лидера последователь не видел — полная синхронизация, а не неверный ответ
+    assert follower.changes(leader_states[1].version, follower_states[-1])["full_resync"]
@@ -0,0 +1,75 @@
+"""
+Числитель/знаменатель по дате: неделя отсчитывается от московской даты страницы;
+индекс расписания с заменами строится при публикации снимков.
+
+Запуск: python -m pytest -q test_effective.py
+"""
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from effective import MOSCOW, week_type_on
+from models import WeekType
+from snapshot import build_replacements_snapshot, parse_schedule_page
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Понедельник 24.11.2025, 00:30 по Москве — в UTC ещё воскресенье 23.11
+MONDAY_NIGHT = datetime(2025, 11, 24, 0, 30, tzinfo=MOSCOW).timestamp()
+
+
+@pytest.fixture
+def utc(monkeypatch):
+    """Сервер в UTC, как на Render"""
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _snapshot(page_date: str):
+    html = (FIXTURES / "schedule.html").read_text(encoding="utf-8")
+    html = html.replace("<h2>27 Ноября - Четверг</h2>", f"<h2>{page_date}</h2>")
+    return parse_schedule_page(html, fetched_at=MONDAY_NIGHT)
+
+
+@pytest.mark.parametrize("page_date", ["24 Ноября - Понедельник", ""])
+def test_week_type_after_moscow_midnight(utc, page_date):
+    snapshot = _snapshot(page_date)
+    assert snapshot.week_info.week_type == WeekType.DENOMINATOR
+
+    assert week_type_on(date(2025, 11, 24), snapshot) == WeekType.DENOMINATOR
+    assert week_type_on(date(2025, 11, 29), snapshot) == WeekType.DENOMINATOR
+    assert week_type_on(date(2025, 11, 23), snapshot) == WeekType.NUMERATOR
+    assert week_type_on(date(2025, 12, 1), snapshot) == WeekType.NUMERATOR
+    assert week_type_on(date(2025, 12, 8), snapshot) == WeekType.DENOMINATOR
+
+
+def test_week_type_year_boundary():
+    # Страница за 29 декабря, загруженная уже 2 января: год даты — прошлый
+    snapshot = _snapshot("29 Декабря - Понедельник").model_copy(
+        update={"fetched_at": datetime(2026, 1, 2, 12, tzinfo=MOSCOW).timestamp()}
+    )
+    assert week_type_on(date(2025, 12, 29), snapshot) == WeekType.DENOMINATOR
+    assert week_type_on(date(2026, 1, 5), snapshot) == WeekType.NUMERATOR
+
+
+def test_index_is_built_on_publication():
+    import main
+
+    schedule = parse_schedule_page((FIXTURES / "schedule.html").read_text(encoding="utf-8"), version=1)
+    replacements = build_replacements_snapshot((FIXTURES / "replacements.html").read_text(encoding="utf-8"), version=2)
+    previous = main.schedule_cache.value, main.replacements_cache.value
+    try:
+        main.schedule_cache.seed(schedule)
+        main.replacements_cache.seed(replacements)
+        # Без единого запроса к /api/effective-schedule
+        assert main.effective_index is not None and main.effective_index.is_for(schedule, replacements)
+    finally:
+        for cache, value in zip((main.schedule_cache, main.replacements_cache), previous):
+            if value is not None:
+                cache.seed(value)
@@ -0,0 +1,64 @@
+"""
+Дифференциальный тест парсеров: parser.py (BeautifulSoup) и parser_lxml.py (XPath)
+должны выдавать одинаковые модели на синтетических страницах из fixtures/
+(в разметке mpt.ru, но не сохранённых с сайта).
+
+Запуск: python -m pytest -q test_parser_backends.py
+"""
+from pathlib import Path
+
+import pytest
+
+import parser
+import parser_lxml
+from models import Specialty
+from snapshot import parse_schedule_page, parse_replacements_page
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SCHEDULE_PAGES = sorted(FIXTURES.glob("schedule*.html"))
+REPLACEMENTS_PAGES = sorted(FIXTURES.glob("replacements*.html"))
+
+
+def _read(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("page", SCHEDULE_PAGES, ids=lambda p: p.name)
+def test_schedule_snapshot_is_identical(page):
+    html = _read(page)
+    expected = parse_schedule_page(html, fetched_at=0, backend_name="bs4")
+    actual = parse_schedule_page(html, fetched_at=0, backend_name="lxml")
+
+    assert expected.specialties, "в фикстуре должны быть специальности"
+    assert actual == expected
+
+
+@pytest.mark.parametrize("page", SCHEDULE_PAGES, ids=lambda p: p.name)
+def test_schedule_functions_are_identical(page):
+    html = _read(page)
+    soup = parser.parse_document(html)
+    root = parser_lxml.parse_document(html)
+
+    assert parser_lxml.parse_week_info(root) == parser.parse_week_info(soup)
+
+    specialties = parser.parse_specialties(soup)
+    assert parser_lxml.parse_specialties(root) == specialties
+
+    for spec in specialties + [Specialty(id="missing", code="-", name="-")]:
+        groups = parser.parse_groups_for_specialty(soup, spec.id)
+        assert parser_lxml.parse_groups_for_specialty(root, spec.id) == groups
+
+        for name in [g.name for g in groups] + ["Несуществующая-1-00"]:
+            assert parser_lxml.parse_schedule_for_group(root, name, spec.id) == \
+                parser.parse_schedule_for_group(soup, name, spec.id)
+
+
+@pytest.mark.parametrize("page", REPLACEMENTS_PAGES, ids=lambda p: p.name)
+def test_replacements_are_identical(page):
+    html = _read(page)
+    expected = parse_replacements_page(html, backend_name="bs4")
+    actual = parse_replacements_page(html, backend_name="lxml")
+
+    assert expected.days, "в фикстуре должны быть замены"
+    assert actual == expected
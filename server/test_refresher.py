@@ -0,0 +1,94 @@
+"""
+RefreshingCache: хороший снимок продолжает отдаваться, когда mpt.ru недоступен,
+а возраст снимка лидера считается от его проверки.
+
+Запуск: python -m pytest -q test_refresher.py
+"""
+import asyncio
+import time
+from pathlib import Path
+
+from refresher import Checked, RefreshingCache
+from snapshot import ReplacementsSnapshot, build_replacements_snapshot
+from store import SnapshotStore
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class FlakyLoader:
+    """Первая загрузка удачна, дальше — ошибка соединения, пока up=False"""
+
+    def __init__(self):
+        self.up = True
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if not self.up:
+            raise ConnectionError("All connection attempts failed")
+        return {"version": self.calls}
+
+
+def test_invalidate_keeps_serving_good_snapshot():
+    async def scenario():
+        loader = FlakyLoader()
+        cache = RefreshingCache("test", loader, soft_ttl=60, hard_ttl=600, serve_stale=True)
+        assert await cache.get() == {"version": 1}
+
+        loader.up = False
+        cache.invalidate()
+        # Обновление идёт в фоне, запрос получает текущее значение, а не ошибку
+        assert await cache.get() == {"version": 1}
+        await asyncio.sleep(0)
+        assert await cache.get() == {"version": 1}
+        assert loader.calls >= 2
+        assert cache.is_stale
+
+        loader.up = True
+        await cache.refresh()
+        assert await cache.get() == {"version": loader.calls}
+        assert not cache.is_stale
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_without_value_waits_for_load():
+    async def scenario():
+        loader = FlakyLoader()
+        cache = RefreshingCache("test", loader, soft_ttl=60, hard_ttl=600, serve_stale=True)
+        cache.invalidate()
+        assert await cache.get() == {"version": 1}
+
+    asyncio.run(scenario())
+
+
+def test_age_comes_from_leader_check(tmp_path):
+    async def scenario():
+        store = SnapshotStore(str(tmp_path / "snapshots.db"))
+        snapshot = build_replacements_snapshot(
+            (FIXTURES / "replacements.html").read_text(encoding="utf-8"), fetched_at=time.time() - 3600
+        )
+        store.save("replacements", snapshot)
+        store.mark_checked("replacements", None, "All connection attempts failed")
+
+        # Снимок с диска после рестарта: возраст — от проверки лидером, ошибка сохранена
+        stored = store.load("replacements", ReplacementsSnapshot)
+        cache = RefreshingCache("test", None, soft_ttl=60, hard_ttl=600, serve_stale=True)
+        cache.seed(stored.snapshot, stored.checked_at, stored.last_error)
+        assert cache.age > 3500
+        assert cache.is_stale
+
+        # Последователь: загрузчик возвращает снимок лидера со временем его проверки
+        store.mark_checked("replacements", time.time() - 10)
+        status = store.status("replacements")
+
+        async def load_published():
+            return Checked(cache.value, status.checked_at, status.last_error)
+
+        follower = RefreshingCache("test", load_published, soft_ttl=60, hard_ttl=600, serve_stale=True)
+        await follower.refresh()
+        assert 9 < follower.age < 60
+        assert not follower.is_stale
+
+    asyncio.run(scenario())
@@ -0,0 +1,63 @@
+"""
+Индекс групп на странице замен: точный поиск по составным названиям
+(в том числе в выгрузке /api/export по специальности).
+
+Запуск: python -m pytest -q test_replacements_index.py
+"""
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from parser import group_tokens, get_replacements_for_group
+from snapshot import build_replacements_snapshot, parse_schedule_page
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    html = (FIXTURES / "replacements.html").read_text(encoding="utf-8")
+    return build_replacements_snapshot(html, fetched_at=0)
+
+
+def _group_names(response):
+    return [group.group_name for day in response.days for group in day.groups]
+
+
+def test_group_tokens():
+    assert group_tokens("Э-1-22, Э-11/1-23") == ["Э-1-22", "Э-11/1-23"]
+    assert group_tokens(" э-1-22 ,Э-1-22") == ["Э-1-22"]
+    assert group_tokens("") == []
+
+
+def test_prefix_does_not_match_longer_group(snapshot):
+    assert "Э-1-2" not in _group_names(snapshot.for_group("Э-1-22"))
+    assert "Э-1-22, Э-11/1-23" not in _group_names(snapshot.for_group("Э-1-2"))
+
+
+@pytest.mark.parametrize("name", ["Э-1-22", "Э-11/1-23", "Э-1-22, Э-11/1-23", "Э-1-2", "ИС-1-23", "Ю-1-23", "нет"])
+def test_index_matches_scan(snapshot, name):
+    assert snapshot.for_group(name) == get_replacements_for_group(snapshot.replacements, name)
+
+
+def test_export_includes_composite_captions():
+    import main
+
+    schedule = parse_schedule_page((FIXTURES / "schedule.html").read_text(encoding="utf-8"), fetched_at=0)
+    html = (FIXTURES / "replacements.html").read_text(encoding="utf-8")
+    # Общая таблица двух групп разных специальностей
+    replacements = build_replacements_snapshot(html.replace("<b>Э-2-22</b>", "<b>Э-2-22, ИС-1-23</b>"), fetched_at=0)
+
+    async def exported(specialty_id):
+        return [json.loads(line) async for line in main.stream_export(schedule, replacements, specialty_id)]
+
+    for specialty_id, groups in schedule.schedules.items():
+        names = {row["group_name"] for row in asyncio.run(exported(specialty_id)) if row["type"] == "replacements"}
+        expected = {name for group in groups for name in _group_names(replacements.for_group(group))}
+        assert names == expected, specialty_id
+    assert "Э-2-22, ИС-1-23" in {
+        row["group_name"] for row in asyncio.run(exported("b1c2")) if row["type"] == "replacements"
+    }
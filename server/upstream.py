@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import importlib.util
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from metrics import increment, observe
+import config
+
+
+# Статусы, при которых запрос к mpt.ru имеет смысл повторить
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Общий клиент: создаётся в lifespan приложения и переиспользует соединения
+_client: Optional[httpx.AsyncClient] = None
+
+
+def create_client() -> httpx.AsyncClient:
+    """Создаёт HTTP-клиент с пулом соединений и HTTP/2 (если установлен h2)"""
+    return httpx.AsyncClient(
+        http2=config.UPSTREAM_HTTP2 and importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_connections=config.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=config.UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=config.UPSTREAM_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(config.UPSTREAM_TIMEOUT, connect=config.UPSTREAM_CONNECT_TIMEOUT)
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Общий клиент (создаётся при первом обращении, если lifespan не запускался)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def close_client():
+    """Закрывает общий клиент (вызывается при остановке приложения)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _backoff(attempt: int) -> float:
+    """Пауза перед повтором: full jitter"""
+    return random.uniform(0, min(config.UPSTREAM_BACKOFF_MAX, config.UPSTREAM_BACKOFF_BASE * 2 ** attempt))
+
+
+async def get(url: str, headers: Optional[dict] = None, name: str = "page") -> httpx.Response:
+    """
+    GET через общий клиент с ограниченным числом повторов.
+
+    Повторяются сетевые ошибки и ответы из RETRY_STATUSES; после последней
+    попытки ошибка пробрасывается (или возвращается ответ с ошибкой).
+    """
+    client = get_client()
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.TransportError:
+            observe("upstream.fetch", time.perf_counter() - started, {"page": name, "outcome": "error"})
+            increment("upstream.errors", labels={"page": name})
+            if attempt >= config.UPSTREAM_RETRIES:
+                raise
+        else:
+            observe("upstream.fetch", time.perf_counter() - started, {"page": name, "outcome": "ok"})
+            increment("upstream.bytes", len(response.content), {"page": name})
+            if response.status_code not in RETRY_STATUSES or attempt >= config.UPSTREAM_RETRIES:
+                return response
+            increment("upstream.errors", labels={"page": name})
+
+        increment("upstream.retries", labels={"page": name})
+        await asyncio.sleep(_backoff(attempt))
+        attempt += 1
+
+
+class CircuitOpenError(Exception):
+    """mpt.ru недавно несколько раз подряд не ответил: запросы временно не отправляются"""
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для одной страницы mpt.ru.
+
+    После failure_threshold неудачных загрузок подряд размыкается на
+    reset_timeout секунд: загрузка сразу завершается CircuitOpenError, не
+    дожидаясь таймаутов. Затем пропускает одну пробную загрузку: удачная
+    замыкает предохранитель, неудачная снова размыкает его.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def before_request(self):
+        """Бросает CircuitOpenError, если загружать страницу сейчас не нужно"""
+        if self.state == "open":
+            increment("upstream.circuit_rejected", labels={"page": self.name})
+            retry_in = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(f"mpt.ru недоступен, повторная попытка через {retry_in:.0f} с")
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                print(f"Предохранитель {self.name} разомкнут после {self.failures} ошибок подряд")
+            self.opened_at = time.monotonic()
+
+    def to_dict(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+@dataclass
+class FetchResult:
+    """Результат условной загрузки страницы"""
+    text: Optional[str]          # HTML (None, если сервер ответил 304)
+    content_hash: str            # sha256 тела страницы
+    not_modified: bool = False   # Ответ 304 Not Modified
+
+
+class ConditionalFetcher:
+    """
+    Загружает страницу mpt.ru с If-None-Match / If-Modified-Since.
+
+    Валидаторы (ETag, Last-Modified) хранятся вместе с хешем тела, которое они
+    описывают, и отправляются только если у вызывающего разобрана именно эта
+    версия страницы. Если сервер валидаторы не поддерживает, вызывающий
+    сравнивает content_hash с хешем своего снимка и пропускает повторный парсинг.
+    """
+
+    def __init__(self, url: str, name: str = "page"):
+        self.url = url
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name, failure_threshold=config.BREAKER_FAILURES, reset_timeout=config.BREAKER_RESET_TIMEOUT
+        )
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._content_hash: Optional[str] = None
+
+    async def fetch(self, known_hash: Optional[str] = None) -> FetchResult:
+        """Загружает страницу; known_hash — хеш уже разобранной версии"""
+        headers = {}
+        if known_hash is not None and known_hash == self._content_hash:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+
+        self.breaker.before_request()
+        try:
+            response = await get(self.url, headers=headers, name=self.name)
+            if not (response.status_code == 304 and headers):
+                response.raise_for_status()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+
+        if response.status_code == 304 and headers:
+            increment("upstream.not_modified", labels={"page": self.name})
+            return FetchResult(text=None, content_hash=self._content_hash, not_modified=True)
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
+        self._content_hash = content_hash
+
+        if content_hash == known_hash:
+            increment("upstream.unchanged_body", labels={"page": self.name})
+
+        return FetchResult(text=response.text, content_hash=content_hash)
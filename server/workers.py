@@ -0,0 +1,56 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+import metrics
+import config
+
+
+T = TypeVar("T")
+
+# Пул для разбора HTML и построения индексов, чтобы не блокировать event loop
+_executor: Optional[Executor] = None
+
+
+def get_executor() -> Optional[Executor]:
+    """Возвращает пул для парсинга (None в режиме inline)"""
+    global _executor
+    if config.PARSE_EXECUTOR == "inline":
+        return None
+    if _executor is None:
+        if config.PARSE_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=config.PARSE_WORKERS)
+        elif config.PARSE_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(
+                max_workers=config.PARSE_WORKERS, thread_name_prefix="parser"
+            )
+        else:
+            raise ValueError(f"Неизвестный MPT_PARSE_EXECUTOR: {config.PARSE_EXECUTOR}")
+    return _executor
+
+
+async def run_in_pool(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Выполняет func в пуле и возвращает результат в event loop.
+
+    Для пула процессов func и аргументы должны сериализоваться pickle,
+    поэтому передаём функции модульного уровня и строки HTML, а не soup.
+    Замеры, сделанные внутри func, переносятся в metrics в event loop.
+    """
+    executor = get_executor()
+    if executor is None:
+        result, collected = metrics.collect(func, *args, **kwargs)
+    else:
+        loop = asyncio.get_running_loop()
+        result, collected = await loop.run_in_executor(executor, partial(metrics.collect, func, *args, **kwargs))
+    metrics.merge(collected)
+    return result
+
+
+def shutdown():
+    """Останавливает пул (вызывается при остановке приложения)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None